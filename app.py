@@ -1,13 +1,14 @@
+import os
 import streamlit as st
 from datetime import datetime
-from translate_input import trans_text
+from translate_input import trans_text, trans_text_batch, lookup_translation, prefetch_translations
 from language_codes import LANGUAGES
 from email_s import send_email
 import pandas as pd
-from store_pipeline import init_supabase_db, save_booking_to_db
+from store_pipeline import save_booking_to_db
 
-# Initialize DB once
-init_supabase_db()
+# Render cached text (or English) right away and translate the rest in the background
+PROGRESSIVE_TRANSLATION = os.getenv("PROGRESSIVE_TRANSLATION", "1") == "1"
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="MedGuide", layout="wide")
@@ -21,10 +22,28 @@ language = st.sidebar.selectbox(
 )
 
 # --- TRANSLATION HELPER ---
+# Every label passed to T() is remembered for the session, so later reruns
+# translate the whole page in one batch before any widget is drawn.
+if "page_strings" not in st.session_state:
+    st.session_state.page_strings = {}
+
+if language != "en" and st.session_state.page_strings and not PROGRESSIVE_TRANSLATION:
+    trans_text_batch(st.session_state.page_strings.keys(), language)
+
+# Labels shown untranslated during this run (progressive mode only)
+missing_strings = []
+
 def T(text):
     """Translate text to user's chosen language"""
+    st.session_state.page_strings[text] = None
     if language == "en":
         return text
+    if PROGRESSIVE_TRANSLATION:
+        translation = lookup_translation(text, language)
+        if translation is None:
+            missing_strings.append(text)
+            return text
+        return translation
     try:
         return trans_text(text, language)
     except Exception:
@@ -241,3 +260,27 @@ st.markdown(f"""
     <p>© 2025 {T("Health Assist")} | {T("MEDGuide❤️")}</p>
 </footer>
 """, unsafe_allow_html=True)
+
+
+# --- BACKGROUND TRANSLATION ---
+# Fetch labels that were shown in English and rerun the page once they arrive.
+# Each label is requested once per session, so a failing provider can't cause
+# a rerun loop.
+if missing_strings:
+    if "prefetched_strings" not in st.session_state:
+        st.session_state.prefetched_strings = set()
+    new_strings = [t for t in missing_strings if (t, language) not in st.session_state.prefetched_strings]
+
+    if new_strings:
+        st.session_state.prefetched_strings.update((t, language) for t in new_strings)
+        st.session_state.translation_prefetch = prefetch_translations(new_strings, language)
+
+if st.session_state.get("translation_prefetch") is not None:
+
+    @st.fragment(run_every=1)
+    def refresh_when_translated():
+        if st.session_state.translation_prefetch.done():
+            st.session_state.translation_prefetch = None
+            st.rerun()
+
+    refresh_when_translated()
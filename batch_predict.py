@@ -0,0 +1,127 @@
+import os
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+# --- BATCH SETTINGS ---
+DEFAULT_CHUNKSIZE = 50_000
+PREDICTION_COLUMN = "Predicted_Disease"
+
+
+def read_chunks(path, chunksize, skip_rows=0):
+    """Stream a CSV or Parquet file as DataFrames of at most chunksize rows, after the first skip_rows."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            if skip_rows >= batch.num_rows:
+                skip_rows -= batch.num_rows
+                continue
+            yield batch.slice(skip_rows).to_pandas()
+            skip_rows = 0
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, skiprows=range(1, skip_rows + 1))
+
+
+class ChunkWriter:
+    """Append scored chunks to a CSV or Parquet file as they arrive.
+
+    Parquet files take their schema from the first chunk unless ``schema``
+    (a pyarrow schema) is given.
+    """
+
+    def __init__(self, path, schema=None):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        self.schema = schema
+        self._writer = None
+        self._started = False
+
+    def write(self, chunk):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self._writer is None:
+                table = pa.Table.from_pandas(chunk, schema=self.schema, preserve_index=False)
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                table = pa.Table.from_pandas(chunk, schema=self._writer.schema, preserve_index=False)
+            self._writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode="a" if self._started else "w", header=not self._started, index=False)
+        self._started = True
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        elif self.parquet and self.schema is not None:
+            # No rows: still leave a valid, empty file
+            import pyarrow.parquet as pq
+            pq.ParquetWriter(self.path, self.schema).close()
+
+
+# --- WORKERS ---
+def _init_worker():
+    """Load the preprocessor and model once per worker process."""
+    import prediction_pipeline  # noqa: F401
+
+
+def _score_chunk(chunk):
+    from prediction_pipeline import predict_diseases
+    return predict_diseases(chunk)
+
+
+def score_file(input_path, output_path, chunksize=DEFAULT_CHUNKSIZE, workers=None):
+    """Score every row of input_path and write it, with predictions, to output_path.
+
+    At most two chunks per worker are in flight, so memory stays bounded
+    regardless of file size. Output rows keep the input order.
+    """
+    workers = workers if workers is not None else os.cpu_count() or 1
+    writer = ChunkWriter(output_path)
+    total_rows = 0
+    start = time.perf_counter()
+
+    def flush(chunk, predictions):
+        nonlocal total_rows
+        chunk[PREDICTION_COLUMN] = predictions
+        writer.write(chunk)
+        total_rows += len(chunk)
+        elapsed = time.perf_counter() - start
+        print(f"⏳ {total_rows:,} rows scored ({total_rows / elapsed:,.0f} rows/s)")
+
+    try:
+        if workers <= 1:
+            _init_worker()
+            for chunk in read_chunks(input_path, chunksize):
+                flush(chunk, _score_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                pending = deque()
+                for chunk in read_chunks(input_path, chunksize):
+                    pending.append((chunk, pool.submit(_score_chunk, chunk)))
+                    if len(pending) >= workers * 2:
+                        chunk, future = pending.popleft()
+                        flush(chunk, future.result())
+                while pending:
+                    chunk, future = pending.popleft()
+                    flush(chunk, future.result())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    rate = total_rows / elapsed if elapsed else 0.0
+    print(f"✅ Scored {total_rows:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s) -> {output_path}")
+    return total_rows, rate
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a large patient CSV/Parquet file in chunks.")
+    parser.add_argument("input", help="CSV or .parquet file shaped like realistic_patient_symptom_features.csv")
+    parser.add_argument("output", help="output .csv or .parquet file")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows per chunk")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores, 1 = in-process)")
+    args = parser.parse_args()
+
+    score_file(args.input, args.output, args.chunksize, args.workers)
@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Keep the benchmark away from the real translation cache and database
+BENCH_DIR = tempfile.mkdtemp(prefix="medguide-bench-")
+os.environ["TRANSLATION_CACHE_DB"] = os.path.join(BENCH_DIR, "translation_cache.db")
+os.environ["STORE_SPOOL_PATH"] = os.path.join(BENCH_DIR, "store_spool.db")
+os.environ["STORE_BACKEND"] = "sqlite"
+os.environ["STORE_SQLITE_PATH"] = os.path.join(BENCH_DIR, "bench.db")
+
+import sklearn
+import translate_input
+import store_pipeline
+from prediction_pipeline import process_prediction, get_preprocessor, reload_artifacts, active_model_version
+from resource_usage import peak_rss
+from train import DATA_PATH
+
+# --- BENCHMARK SETTINGS ---
+BENCHMARK_DIR = os.getenv("BENCHMARK_DIR", "benchmarks")
+BATCH_SIZES = [64, 1024]
+# Simulated provider round trip for the stubbed translator
+TRANSLATION_LATENCY_MS = 20
+TRANSLATION_BATCH = 20
+BENCH_LANGUAGE = "xx"
+
+_SAMPLE_BOOKING = {
+    "Name": ["Bench Patient"], "Email": ["bench@example.com"], "Preferred Date": ["2025-01-01"],
+    "Preferred Time": ["09:00:00"], "Problem": ["Fever", "Headache"], "Start_date": ["2-3 days ago"],
+    "Current_condition_after_start": ["Same"], "Severity": [3], "Occured_Before": ["No"],
+    "Medication_taken": ["No"], "Fever": ["Yes"], "Pain": ["Mild"], "Cough/Cold/Breath_Shortness": ["No"],
+    "Change_in_appetite/weight": ["No"], "Chronic_Conditions": ["None"], "Current_Medication": ["None"],
+    "Allergies": ["None"], "Past_Hospitalization/Surgery": ["No"], "Smoke_or_Alcohol": ["Neither"],
+    "Sleep_Hours": [7], "Exercise_Frequency": ["Weekly"], "Stress/Fatigue": ["No"],
+    "Women_Status": ["None of the above"], "Other_Notes": ["-"],
+}
+
+
+class StubTranslator:
+    """Stands in for the remote provider: waits a fixed latency and reverses the text."""
+
+    def __init__(self, latency_ms):
+        self.latency = latency_ms / 1000
+
+    def translate(self, text):
+        time.sleep(self.latency)
+        return text[::-1]
+
+
+def _time_calls(fn, runs, warmup=3):
+    """Wall-clock seconds of ``runs`` calls to fn(i), after a few untimed warm-up calls."""
+    for i in range(warmup):
+        fn(i)
+    latencies = np.empty(runs)
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(warmup + i)
+        latencies[i] = time.perf_counter() - start
+    return latencies
+
+
+def summarise(latencies, items_per_call=1):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "runs": len(latencies),
+        "items_per_call": items_per_call,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "mean_ms": latencies.mean() * 1000,
+        "throughput_per_s": items_per_call * len(latencies) / latencies.sum(),
+        # Peak of the whole process so far: shows which case first pushed memory up
+        "peak_rss_mb": peak_rss(),
+    }
+
+
+# --- CASES ---
+def bench_model_load(runs, patients):
+    return _time_calls(lambda i: reload_artifacts(), runs), 1
+
+
+def bench_prediction_single(runs, patients):
+    """Distinct patients with the memoisation bypassed, i.e. a full transform and predict each time."""
+    preprocessor = get_preprocessor()
+    rows = [patients.iloc[[i]] for i in range(len(patients))]
+    return _time_calls(lambda i: process_prediction(rows[i % len(rows)], preprocessor=preprocessor), runs), 1
+
+
+def bench_prediction_cached(runs, patients):
+    row = patients.iloc[[0]]
+    return _time_calls(lambda i: process_prediction(row), runs), 1
+
+
+def _bench_prediction_batch(size):
+    def bench(runs, patients):
+        batch = patients.sample(size, replace=True, random_state=42).reset_index(drop=True)
+        return _time_calls(lambda i: process_prediction(batch), runs), size
+    return bench
+
+
+def bench_transform_single(runs, patients):
+    preprocessor = get_preprocessor()
+    rows = [patients.iloc[[i]] for i in range(len(patients))]
+    return _time_calls(lambda i: preprocessor.transform(rows[i % len(rows)]), runs), 1
+
+
+def bench_transform_batch(runs, patients):
+    preprocessor = get_preprocessor()
+    batch = patients.sample(BATCH_SIZES[-1], replace=True, random_state=42).reset_index(drop=True)
+    return _time_calls(lambda i: preprocessor.transform(batch), runs), len(batch)
+
+
+def bench_translation_cold(runs, patients):
+    """A page's worth of new strings per call, each a (stubbed) provider round trip."""
+    translate_input._translators[BENCH_LANGUAGE] = StubTranslator(TRANSLATION_LATENCY_MS)
+
+    def translate_page(i):
+        translate_input.trans_text_batch([f"Label {i}-{k}" for k in range(TRANSLATION_BATCH)], BENCH_LANGUAGE)
+    return _time_calls(translate_page, runs), TRANSLATION_BATCH
+
+
+def bench_translation_cached(runs, patients):
+    translate_input._translators[BENCH_LANGUAGE] = StubTranslator(TRANSLATION_LATENCY_MS)
+    labels = [f"Cached label {k}" for k in range(TRANSLATION_BATCH)]
+    translate_input.trans_text_batch(labels, BENCH_LANGUAGE)
+    return _time_calls(lambda i: translate_input.trans_text_batch(labels, BENCH_LANGUAGE), runs), TRANSLATION_BATCH
+
+
+def _sample_prediction():
+    return {
+        "Age": 30, "Gender": "Male", "Fever": 38.5, "Cough": 1, "Headache": 1, "Fatigue": 3, "Nausea": 0,
+        "Muscle_Pain": 2, "Shortness_of_Breath": 0, "Loss_of_Taste": 0, "Abdominal_Pain": 0,
+        "Appetite_Loss": 1, "Frequent_Urination": 0, "Thirst_Level": 0, "Blurred_Vision": 0,
+        "Symptom_Duration_Days": 3, "Severity": 2, "Predicted_Disease": "Influenza",
+    }
+
+
+def bench_store_prediction(runs, patients):
+    with contextlib.redirect_stdout(None):
+        return _time_calls(lambda i: store_pipeline.save_predictions_to_db(_sample_prediction()), runs), 1
+
+
+def bench_store_booking(runs, patients):
+    with contextlib.redirect_stdout(None):
+        return _time_calls(
+            lambda i: store_pipeline.save_booking_to_db({k: list(v) for k, v in _SAMPLE_BOOKING.items()}), runs
+        ), 1
+
+
+def bench_store_insert_batch(runs, patients):
+    """What the background writer does: one multi-row insert per batch."""
+    batch = [_sample_prediction() for _ in range(100)]
+    return _time_calls(lambda i: store_pipeline.insert_records("predictions", batch), runs), len(batch)
+
+
+CASES = {
+    "model_load": bench_model_load,
+    "prediction_single": bench_prediction_single,
+    "prediction_cached": bench_prediction_cached,
+    **{f"prediction_batch_{size}": _bench_prediction_batch(size) for size in BATCH_SIZES},
+    "transform_single": bench_transform_single,
+    "transform_batch": bench_transform_batch,
+    "translation_cold": bench_translation_cold,
+    "translation_cached": bench_translation_cached,
+    "store_prediction": bench_store_prediction,
+    "store_booking": bench_store_booking,
+    "store_insert_batch": bench_store_insert_batch,
+}
+
+
+def run_benchmarks(cases=None, runs=200, data_path=DATA_PATH):
+    """Run the selected cases (all by default) and return the results with the environment they ran in."""
+    patients = pd.read_csv(data_path).drop(columns=['Patient_ID', 'Disease'])
+    results = {}
+    for name in cases or CASES:
+        # Slow cases (model load, cold translation) get fewer runs
+        case_runs = max(runs // 10, 10) if name in ("model_load", "translation_cold") else runs
+        latencies, items = CASES[name](case_runs, patients)
+        results[name] = summarise(latencies, items)
+        print(_format_row(name, results[name]))
+
+    return {
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "model_version": active_model_version(),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=0.10):
+    """Print p50/p99 changes against a baseline run; returns the cases that got slower than threshold."""
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        changes = {m: result[m] / before[m] - 1 for m in ("p50_ms", "p99_ms") if before[m] > 0}
+        slower = any(change > threshold for change in changes.values())
+        if slower:
+            regressions.append(name)
+        print(f"{'⚠️' if slower else '  '} {name:<24} " + "  ".join(f"{m}: {c:+.1%}" for m, c in changes.items()))
+    return regressions
+
+
+def _format_row(name, r):
+    return (f"{name:<24} p50={r['p50_ms']:9.3f}ms  p95={r['p95_ms']:9.3f}ms  p99={r['p99_ms']:9.3f}ms  "
+            f"throughput={r['throughput_per_s']:10.1f}/s  peak_rss={r['peak_rss_mb']:.1f}MB")
+
+
+# --- RUN ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark prediction, translation and storage latency.")
+    parser.add_argument("cases", nargs="*", help=f"cases to run (default: all): {', '.join(CASES)}")
+    parser.add_argument("--runs", type=int, default=200, help="timed calls per case")
+    parser.add_argument("--out", default=None, help="results file (default: benchmarks/<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown that counts as a regression")
+    args = parser.parse_args()
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    report = run_benchmarks(args.cases, args.runs)
+
+    out = args.out or os.path.join(BENCHMARK_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results saved to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"❌ Slower than baseline: {', '.join(regressions)}")
+            sys.exit(1)
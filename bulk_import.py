@@ -0,0 +1,106 @@
+import os
+import time
+import logging
+import argparse
+from datetime import date
+import pandas as pd
+from sqlalchemy import types
+from batch_predict import read_chunks
+from store_pipeline import backend
+
+# --- IMPORT SETTINGS ---
+IMPORT_CHUNKSIZE = int(os.getenv("STORE_IMPORT_CHUNKSIZE", 50_000))
+# Source columns (lower-cased) with a different name in predictions; other columns are matched
+# case-insensitively and the rest (e.g. Patient_ID) are dropped
+COLUMN_MAP = {"disease": "predicted_disease", "severity(1-5)": "severity"}
+
+
+def map_columns(chunk, column_types, date_column=None):
+    """Rename a source chunk onto the predictions columns and convert it to their types.
+
+    ``date_column`` names the source column holding each record's date; it becomes predicted_on.
+    """
+    column_map = {**COLUMN_MAP, date_column.lower(): "predicted_on"} if date_column else COLUMN_MAP
+    chunk = chunk.rename(columns=lambda col: column_map.get(col.lower(), col.lower()))
+    frame = chunk[[col for col in chunk.columns if col in column_types and col != "id"]].copy()
+    for col in frame.columns:
+        if isinstance(column_types[col], types.Integer):
+            frame[col] = pd.to_numeric(frame[col], errors="coerce").round().astype("Int64")
+        elif isinstance(column_types[col], (types.Float, types.Numeric)):
+            frame[col] = pd.to_numeric(frame[col], errors="coerce")
+    if "predicted_on" in frame:
+        dates = pd.to_datetime(frame["predicted_on"], errors="coerce")
+        frame["predicted_on"] = dates.dt.strftime("%Y-%m-%d %H:%M:%S").astype(object).where(dates.notna(), None)
+    return frame
+
+
+def import_file(path, chunksize=IMPORT_CHUNKSIZE, restart=False, date_column=None, predicted_on=None):
+    """Load a CSV or Parquet file shaped like realistic_patient_symptom_features.csv into predictions.
+
+    Each row is dated from ``date_column`` (or a predicted_on column in the
+    file); rows without a usable date get ``predicted_on``, and failing that
+    the import time, with a warning, since that puts them all on one day
+    of the trend charts.
+
+    Each chunk is loaded and checkpointed in one transaction, so running
+    the same file again resumes after the last loaded chunk. Returns
+    (rows loaded by this run, rows per second).
+    """
+    source = os.path.abspath(path)
+    file_size = os.path.getsize(path)
+    if restart:
+        backend.reset_import(source)
+    done, recorded_size = backend.import_progress(source)
+    if done and recorded_size != file_size:
+        raise ValueError(f"{path} changed since {done:,} of its rows were imported; run with --restart to load it again")
+    if done:
+        print(f"♻️ Resuming {path} after {done:,} rows already imported")
+
+    column_types = backend.table_columns("predictions")
+    fallback = pd.Timestamp(predicted_on) if predicted_on is not None else pd.Timestamp.now()
+    fallback_date = fallback.strftime("%Y-%m-%d %H:%M:%S")
+    undated = 0
+    loaded = 0
+    start = time.perf_counter()
+
+    for chunk in read_chunks(path, chunksize, skip_rows=done):
+        if chunk.empty:
+            continue
+        frame = map_columns(chunk, column_types, date_column)
+        if date_column and "predicted_on" not in frame:
+            raise ValueError(f"{path} has no {date_column!r} column")
+        if "predicted_on" not in frame:
+            frame["predicted_on"] = None
+        missing = frame["predicted_on"].isna()
+        undated += int(missing.sum())
+        frame.loc[missing, "predicted_on"] = fallback_date
+        backend.load_chunk("predictions", frame, source, done + len(chunk), file_size)
+        done += len(chunk)
+        loaded += len(chunk)
+        elapsed = time.perf_counter() - start
+        print(f"⏳ {done:,} rows imported ({loaded / elapsed:,.0f} rows/s)")
+
+    if undated and predicted_on is None:
+        logging.warning(f"{undated:,} rows had no date and were recorded as predicted on {fallback_date} (the import "
+                        f"time); pass --date-column or --predicted-on to keep historical trends correct")
+    elif undated:
+        print(f"📅 {undated:,} rows without a date recorded as predicted on {fallback_date}")
+
+    elapsed = time.perf_counter() - start
+    rate = loaded / elapsed if elapsed else 0.0
+    print(f"✅ Imported {loaded:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s) into {backend.name} predictions")
+    return loaded, rate
+
+
+# --- RUN ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load historical patient records into the predictions table.")
+    parser.add_argument("input", help="CSV or .parquet file shaped like realistic_patient_symptom_features.csv")
+    parser.add_argument("--chunksize", type=int, default=IMPORT_CHUNKSIZE, help="rows per chunk (and per transaction)")
+    parser.add_argument("--restart", action="store_true", help="ignore an earlier partial import of this file and start over")
+    parser.add_argument("--date-column", default=None, help="source column with each record's date (becomes predicted_on)")
+    parser.add_argument("--predicted-on", type=date.fromisoformat, default=None,
+                        help="date (YYYY-MM-DD) for rows without one (default: the import time, with a warning)")
+    args = parser.parse_args()
+
+    import_file(args.input, args.chunksize, args.restart, args.date_column, args.predicted_on)
@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import joblib
+import numpy as np
+
+# --- COMPILED FOREST SETTINGS ---
+COMPILED_FOREST_DIR = os.getenv("COMPILED_FOREST_DIR", "disease_predictor_compiled")
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "leaf_index", "leaf_values", "roots")
+
+
+def artifact_hash(path):
+    """SHA-256 of a model file's contents, stamped on the exports compiled from it.
+
+    Unlike the file's mtime it survives copies, so a copied version
+    directory still matches its exports.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _node_depths(tree):
+    """Depth of every node of an sklearn tree (children always come after their parent)."""
+    children_left, children_right = tree.children_left, tree.children_right
+    depth = np.zeros(tree.node_count, dtype=np.int64)
+    for node in range(tree.node_count):
+        if children_left[node] != -1:
+            depth[children_left[node]] = depth[node] + 1
+            depth[children_right[node]] = depth[node] + 1
+    return depth
+
+
+class CompiledForest:
+    """A fitted RandomForestClassifier flattened into contiguous NumPy arrays.
+
+    All trees share one node table. Leaves point to themselves, so every
+    tree can be walked at once for a fixed number of steps (the forest's
+    max depth); each sample then ends on one leaf per tree. Predictions are
+    identical to ``RandomForestClassifier.predict``.
+    """
+
+    def __init__(self, feature, threshold, left, right, leaf_index, leaf_values, roots, classes, max_depth,
+                 leaf_scale=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_index = leaf_index
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.classes_ = classes
+        self.max_depth = max_depth
+        # Set when leaf_values hold integers: probability = value * leaf_scale
+        self.leaf_scale = leaf_scale
+        self.n_features_in_ = None
+        self.source = None
+
+    @classmethod
+    def from_model(cls, model, trees=None, max_depth=None):
+        """Flatten the trees of a fitted sklearn forest classifier.
+
+        ``trees`` keeps only the estimators at those indices and ``max_depth``
+        truncates every tree, turning nodes at that depth into leaves that
+        predict their own class distribution. With neither, predictions are
+        identical to the original forest.
+        """
+        estimators = model.estimators_ if trees is None else [model.estimators_[i] for i in trees]
+        features, thresholds, lefts, rights, leaf_rows, leaf_values, roots = [], [], [], [], [], [], []
+        offset = 0
+        n_leaves = 0
+        depth_reached = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            depth = _node_depths(tree)
+            kept = np.flatnonzero(depth <= max_depth) if max_depth is not None else np.arange(tree.node_count)
+            n = len(kept)
+            nodes = np.arange(n)
+            remap = np.zeros(tree.node_count, dtype=np.int64)
+            remap[kept] = nodes
+
+            is_leaf = tree.children_left[kept] == -1
+            if max_depth is not None:
+                is_leaf |= depth[kept] == max_depth
+
+            features.append(np.where(is_leaf, 0, tree.feature[kept]).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold[kept]))
+            lefts.append(np.where(is_leaf, nodes, remap[tree.children_left[kept]]).astype(np.int32) + offset)
+            rights.append(np.where(is_leaf, nodes, remap[tree.children_right[kept]]).astype(np.int32) + offset)
+
+            # Leaf class distributions, normalised like DecisionTreeClassifier.predict_proba
+            values = tree.value[kept][is_leaf, 0, :]
+            totals = values.sum(axis=1, keepdims=True)
+            totals[totals == 0.0] = 1.0
+            leaf_values.append(values / totals)
+
+            rows = np.full(n, -1, dtype=np.int32)
+            rows[is_leaf] = np.arange(n_leaves, n_leaves + is_leaf.sum(), dtype=np.int32)
+            leaf_rows.append(rows)
+
+            roots.append(offset)
+            offset += n
+            n_leaves += int(is_leaf.sum())
+            depth_reached = max(depth_reached, int(depth[kept].max()))
+
+        forest = cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            leaf_index=np.concatenate(leaf_rows),
+            leaf_values=np.concatenate(leaf_values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_),
+            max_depth=depth_reached,
+        )
+        forest.n_features_in_ = model.n_features_in_
+        return forest
+
+    def quantized(self):
+        """Copy with float16 thresholds, 8-bit leaf probabilities and the smallest index types.
+
+        Smaller and faster to load, but no longer guaranteed to predict exactly
+        like the original forest.
+        """
+        node_type = np.min_scalar_type(len(self.feature) - 1)
+        forest = CompiledForest(
+            feature=self.feature.astype(np.min_scalar_type(int(self.feature.max()))),
+            threshold=self.threshold.astype(np.float16),
+            left=self.left.astype(node_type),
+            right=self.right.astype(node_type),
+            leaf_index=np.maximum(self.leaf_index, 0).astype(np.min_scalar_type(len(self.leaf_values) - 1)),
+            leaf_values=np.round(self.leaf_values * 255).astype(np.uint8),
+            roots=self.roots.astype(node_type),
+            classes=self.classes_,
+            max_depth=self.max_depth,
+            leaf_scale=1 / 255,
+        )
+        forest.n_features_in_ = self.n_features_in_
+        return forest
+
+    def apply(self, X):
+        """Leaf node reached in every tree: array of shape (n_samples, n_trees)."""
+        # sklearn compares float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_samples, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_samples, dtype=np.intp) * n_features)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_samples, self.roots.shape[0])).copy()
+        for _ in range(self.max_depth):
+            values = flat_X.take(row_offsets + self.feature.take(nodes))
+            go_left = values <= self.threshold.take(nodes)
+            nodes = np.where(go_left, self.left.take(nodes), self.right.take(nodes))
+        return nodes
+
+    def predict_proba(self, X):
+        leaves = self.leaf_index[self.apply(X)]
+        proba = self.leaf_values[leaves].mean(axis=1)
+        if self.leaf_scale is not None:
+            proba = proba * self.leaf_scale
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ARRAY_NAMES)
+
+    # --- PERSISTENCE ---
+    def save(self, directory=COMPILED_FOREST_DIR, source=None):
+        """Write each array as a raw .npy file plus a small JSON header.
+
+        ``source`` is the artifact_hash of the model file the forest was
+        compiled from, so a stale export can be detected after retraining.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        meta = {
+            "classes": self.classes_.tolist(),
+            "max_depth": int(self.max_depth),
+            "leaf_scale": self.leaf_scale,
+            "n_features_in": int(self.n_features_in_) if self.n_features_in_ is not None else None,
+            "source": source,
+        }
+        with open(os.path.join(directory, "forest.json"), "w") as f:
+            json.dump(meta, f)
+
+    def save_atomic(self, directory=COMPILED_FOREST_DIR, source=None):
+        """save() to a temporary directory and swap it into place, so readers never see half an export."""
+        tmp_dir, old_dir = f"{directory}.tmp-{os.getpid()}", f"{directory}.old-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        try:
+            self.save(tmp_dir, source=source)
+            if os.path.exists(directory):
+                os.replace(directory, old_dir)
+            os.replace(tmp_dir, directory)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory=COMPILED_FOREST_DIR, mmap_mode=None):
+        with open(os.path.join(directory, "forest.json")) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ARRAY_NAMES
+        }
+        forest = cls(
+            classes=np.asarray(meta["classes"], dtype=object),
+            max_depth=meta["max_depth"],
+            leaf_scale=meta.get("leaf_scale"),
+            **arrays,
+        )
+        forest.n_features_in_ = meta["n_features_in"]
+        forest.source = meta.get("source")
+        return forest
+
+
+if __name__ == "__main__":
+    model_path = sys.argv[1] if len(sys.argv) > 1 else "disease_predictor.pkl"
+    out_dir = sys.argv[2] if len(sys.argv) > 2 else COMPILED_FOREST_DIR
+
+    forest = CompiledForest.from_model(joblib.load(model_path))
+    forest.save(out_dir, source=artifact_hash(model_path))
+    print(f"✅ Compiled {len(forest.roots)} trees ({len(forest.feature):,} nodes, "
+          f"{forest.nbytes / 1e6:.2f} MB) -> {out_dir}")
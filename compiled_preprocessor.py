@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import numpy as np
+import pandas as pd
+
+# --- COMPILED PREPROCESSOR SETTINGS ---
+COMPILED_PREPROCESSOR_PATH = os.getenv("COMPILED_PREPROCESSOR_PATH", "preprocessor_compiled.json")
+
+
+class CompiledPreprocessor:
+    """A fitted ColumnTransformer reduced to a fixed feature-index map.
+
+    Numeric outputs (scaled or passed through) are ``(x - offset) / scale``
+    of one input column; one-hot outputs are ``x == category``. The result is
+    exactly the matrix ``ColumnTransformer.transform`` produces, for one row
+    or many, without sklearn's per-call validation and dispatch.
+    """
+
+    def __init__(self, input_columns, output_columns, numeric, onehot, categories):
+        self.feature_names_in_ = np.asarray(input_columns, dtype=object)
+        self.output_columns = list(output_columns)
+        # numeric: (output index, input column, offset, scale)
+        self.numeric_out = np.asarray([n[0] for n in numeric], dtype=np.intp)
+        self.numeric_columns = [n[1] for n in numeric]
+        self.offset = np.asarray([n[2] for n in numeric], dtype=np.float64)
+        self.scale = np.asarray([n[3] for n in numeric], dtype=np.float64)
+        # onehot: (output index, input column, category)
+        self.onehot = [tuple(o) for o in onehot]
+        # every known category per one-hot input column, for unknown-value checks
+        self.categories = {col: list(values) for col, values in categories.items()}
+        self.source = None
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor):
+        """Compile a fitted ColumnTransformer of OneHotEncoder/StandardScaler/passthrough steps."""
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler, FunctionTransformer
+
+        numeric, onehot, categories = [], [], {}
+        out = 0
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == "drop" or len(columns) == 0:
+                continue
+            columns = [preprocessor.feature_names_in_[c] if isinstance(c, (int, np.integer)) else c for c in columns]
+
+            if transformer == "passthrough" or (
+                isinstance(transformer, FunctionTransformer) and transformer.func is None
+            ):
+                for col in columns:
+                    numeric.append((out, col, 0.0, 1.0))
+                    out += 1
+            elif isinstance(transformer, StandardScaler):
+                for i, col in enumerate(columns):
+                    offset = float(transformer.mean_[i]) if transformer.mean_ is not None else 0.0
+                    scale = float(transformer.scale_[i]) if transformer.scale_ is not None else 1.0
+                    numeric.append((out, col, offset, scale))
+                    out += 1
+            elif isinstance(transformer, OneHotEncoder) and not transformer.sparse_output:
+                drop_idx = transformer.drop_idx_
+                for i, col in enumerate(columns):
+                    values = [v.item() if isinstance(v, np.generic) else v for v in transformer.categories_[i]]
+                    categories[col] = values
+                    for k, value in enumerate(values):
+                        if drop_idx is not None and drop_idx[i] is not None and k == drop_idx[i]:
+                            continue
+                        onehot.append((out, col, value))
+                        out += 1
+            else:
+                raise ValueError(f"Can't compile transformer {name!r} ({type(transformer).__name__})")
+
+        return cls(
+            input_columns=list(preprocessor.feature_names_in_),
+            output_columns=list(preprocessor.get_feature_names_out()),
+            numeric=numeric,
+            onehot=onehot,
+            categories=categories,
+        )
+
+    def get_feature_names_out(self):
+        return np.asarray(self.output_columns, dtype=object)
+
+    def transform(self, X):
+        """Transform a DataFrame holding the input columns."""
+        if not isinstance(X, pd.DataFrame):
+            X = pd.DataFrame(X, columns=self.feature_names_in_)
+
+        out = np.empty((len(X), len(self.output_columns)), dtype=np.float64)
+        if len(self.numeric_out):
+            values = X[self.numeric_columns].to_numpy(dtype=np.float64)
+            out[:, self.numeric_out] = (values - self.offset) / self.scale
+
+        for col, known in self.categories.items():
+            values = X[col].to_numpy()
+            unknown = ~np.isin(values, known)
+            if unknown.any():
+                raise ValueError(f"Found unknown categories {sorted(set(values[unknown]))} in column {col!r}")
+        for j, col, category in self.onehot:
+            out[:, j] = X[col].to_numpy() == category
+        return out
+
+    # --- PERSISTENCE ---
+    def save(self, path=COMPILED_PREPROCESSOR_PATH, source=None):
+        """Write the index map as JSON; ``source`` is the artifact_hash of the pickle it came from."""
+        spec = {
+            "input_columns": list(self.feature_names_in_),
+            "output_columns": self.output_columns,
+            "numeric": [
+                [int(j), col, float(offset), float(scale)]
+                for j, col, offset, scale in zip(self.numeric_out, self.numeric_columns, self.offset, self.scale)
+            ],
+            "onehot": [list(o) for o in self.onehot],
+            "categories": self.categories,
+            "source": source,
+        }
+        with open(path, "w") as f:
+            json.dump(spec, f, indent=2)
+
+    @classmethod
+    def load(cls, path=COMPILED_PREPROCESSOR_PATH):
+        with open(path) as f:
+            spec = json.load(f)
+        source = spec.pop("source", None)
+        compiled = cls(**spec)
+        compiled.source = source
+        return compiled
+
+
+if __name__ == "__main__":
+    import joblib
+    from compiled_forest import artifact_hash
+
+    preprocessor_path = sys.argv[1] if len(sys.argv) > 1 else "preprocessor.pkl"
+    out_path = sys.argv[2] if len(sys.argv) > 2 else COMPILED_PREPROCESSOR_PATH
+
+    compiled = CompiledPreprocessor.from_preprocessor(joblib.load(preprocessor_path))
+    compiled.save(out_path, source=artifact_hash(preprocessor_path))
+    print(f"✅ Compiled preprocessor ({len(compiled.output_columns)} outputs) -> {out_path}")
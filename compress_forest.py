@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+from compiled_forest import CompiledForest, artifact_hash
+from model_registry import artifact_paths, active_version
+from train import DATA_PATH, _split
+
+# --- COMPRESSION SETTINGS ---
+COMPRESSED_MODELS_DIR = os.getenv("COMPRESSED_MODELS_DIR", "compressed_models")
+TREE_COUNTS = [10, 25, 50, 100]
+DEPTH_CAPS = [6, 8, 10, 12]
+
+
+def rank_trees(model, X, target):
+    """Order the trees by contribution: greedy forward selection.
+
+    Each step adds the tree that makes the growing sub-forest agree most often
+    with ``target`` (the full forest's own predictions), so the hold-out
+    labels are never used to choose trees.
+    """
+    per_tree = np.stack([estimator.predict_proba(X) for estimator in model.estimators_])
+    target_index = np.searchsorted(model.classes_, target)
+
+    order, remaining = [], list(range(len(per_tree)))
+    total = np.zeros(per_tree.shape[1:])
+    while remaining:
+        candidates = total + per_tree[remaining]
+        agreement = (candidates.argmax(axis=2) == target_index).mean(axis=1)
+        best = remaining.pop(int(np.argmax(agreement)))
+        order.append(best)
+        total += per_tree[best]
+    return order
+
+
+def build_variants(model, ranking, tree_counts=TREE_COUNTS, depth_caps=DEPTH_CAPS):
+    """Compiled forests keyed by name: fewer trees, capped depth, and a quantized copy of each."""
+    variants = {"full": CompiledForest.from_model(model)}
+    for n in tree_counts:
+        if n < len(model.estimators_):
+            variants[f"top{n}"] = CompiledForest.from_model(model, trees=ranking[:n])
+    for depth in depth_caps:
+        variants[f"depth{depth}"] = CompiledForest.from_model(model, max_depth=depth)
+    for name, forest in list(variants.items()):
+        variants[f"{name}-quantized"] = forest.quantized()
+    return variants
+
+
+def _directory_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def measure(path, load, X_test, y_test, runs=1000):
+    """Size on disk, load time, single-row latency percentiles and hold-out accuracy of one artifact."""
+    start = time.perf_counter()
+    model = load(path)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    accuracy = float((model.predict(X_test) == np.asarray(y_test)).mean())
+
+    latencies = np.empty(runs)
+    for i in range(runs):
+        row = X_test[i % len(X_test)][None, :]
+        start = time.perf_counter()
+        model.predict(row)
+        latencies[i] = time.perf_counter() - start
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+
+    return {
+        "size_mb": _directory_size(path) / 1e6,
+        "load_ms": load_ms,
+        "p50_ms": p50,
+        "p99_ms": p99,
+        "accuracy": accuracy,
+    }
+
+
+def compress(model_path, preprocessor_path, data_path=DATA_PATH, out_dir=COMPRESSED_MODELS_DIR,
+             tree_counts=TREE_COUNTS, depth_caps=DEPTH_CAPS, runs=1000):
+    """Write every variant under ``out_dir`` and return the trade-off table (also saved as report.csv)."""
+    model = joblib.load(model_path)
+    preprocessor = joblib.load(preprocessor_path)
+
+    df = pd.read_csv(data_path)
+    X = preprocessor.transform(df.drop(columns=['Patient_ID', 'Disease']))
+    X_train, X_test, y_train, y_test = _split(X, df['Disease'])
+
+    print(f"📚 Ranking {len(model.estimators_)} trees on {len(X_train)} training rows")
+    ranking = rank_trees(model, X_train, model.predict(X_train))
+    variants = build_variants(model, ranking, tree_counts, depth_caps)
+
+    # Stamped with the pickle's content hash, so serving accepts a variant in place of the full export
+    source = artifact_hash(model_path)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.makedirs(out_dir)
+
+    rows = [{"variant": "sklearn", "trees": len(model.estimators_),
+             "nodes": int(sum(e.tree_.node_count for e in model.estimators_)),
+             **measure(model_path, joblib.load, X_test, y_test, runs)}]
+    for name, forest in variants.items():
+        path = os.path.join(out_dir, name)
+        forest.save(path, source=source)
+        rows.append({"variant": name, "trees": len(forest.roots), "nodes": len(forest.feature),
+                     **measure(path, CompiledForest.load, X_test, y_test, runs)})
+        print(f"✅ {name}")
+
+    report = pd.DataFrame(rows)
+    report.to_csv(os.path.join(out_dir, "report.csv"), index=False)
+    return report
+
+
+def install_variant(name, out_dir=COMPRESSED_MODELS_DIR, version=None):
+    """Make a written variant the compiled forest that serving loads for a version (the active one by default).
+
+    The variant must have been compressed from that version's model (its
+    source hash is checked), otherwise serving would ignore it. Returns the
+    directory it was installed to.
+    """
+    paths = artifact_paths(version)
+    source_dir = os.path.join(out_dir, name)
+    if not os.path.isdir(source_dir):
+        available = sorted(d for d in os.listdir(out_dir) if os.path.isdir(os.path.join(out_dir, d))) \
+            if os.path.isdir(out_dir) else []
+        raise ValueError(f"No variant {name!r} in {out_dir} (available: {', '.join(available) or 'none'})")
+    forest = CompiledForest.load(source_dir)
+    if forest.source != artifact_hash(paths["model"]):
+        raise ValueError(f"{name} was not compressed from {paths['model']}; run compress_forest.py against it first")
+
+    target = paths["compiled"]
+    tmp_dir, old_dir = f"{target}.tmp", f"{target}.old"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    shutil.copytree(source_dir, tmp_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(target):
+        os.replace(target, old_dir)
+    os.replace(tmp_dir, target)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return target
+
+
+# --- RUN ---
+if __name__ == "__main__":
+    paths = artifact_paths()
+    parser = argparse.ArgumentParser(description="Write smaller variants of the forest and report their trade-offs.")
+    parser.add_argument("--model", default=paths["model"])
+    parser.add_argument("--preprocessor", default=paths["preprocessor"])
+    parser.add_argument("--data", default=DATA_PATH, help="labelled CSV; its train/test split gives the hold-out set")
+    parser.add_argument("--out", default=COMPRESSED_MODELS_DIR)
+    parser.add_argument("--trees", type=int, nargs="*", default=TREE_COUNTS, help="tree counts to keep")
+    parser.add_argument("--depths", type=int, nargs="*", default=DEPTH_CAPS, help="depth caps to try")
+    parser.add_argument("--runs", type=int, default=1000, help="single-row predictions timed per variant")
+    parser.add_argument("--install", metavar="VARIANT", default=None,
+                        help="instead of compressing, install a variant from --out for the active model version")
+    args = parser.parse_args()
+
+    if args.install:
+        target = install_variant(args.install, args.out)
+        print(f"✅ {args.install} installed to {target} (restart the app, or call reload_artifacts, to serve it)")
+        sys.exit()
+
+    report = compress(args.model, args.preprocessor, args.data, args.out, args.trees, args.depths, args.runs)
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    print(f"Serve a variant with: python compress_forest.py --install <variant> --out {args.out}")
+    if active_version() is None:
+        # Legacy mode only: COMPILED_FOREST_DIR is ignored once a registry version is active
+        print(f"(or, without a registered version, COMPILED_FOREST_DIR={os.path.join(args.out, '<variant>')})")
@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import shutil
+import logging
+from datetime import datetime
+import joblib
+
+# --- REGISTRY SETTINGS ---
+REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", "models")
+ACTIVE_FILE = "ACTIVE"
+METADATA_FILE = "metadata.json"
+PREPROCESSOR_FILE = "preprocessor.pkl"
+COMPILED_PREPROCESSOR_FILE = "preprocessor.json"
+MODEL_FILE = "disease_predictor.pkl"
+COMPILED_DIR = "compiled"
+
+# Artifacts from before the registry existed, served when no version is active
+LEGACY_PREPROCESSOR_PATH = "preprocessor.pkl"
+LEGACY_MODEL_PATH = "disease_predictor.pkl"
+LEGACY_COMPILED_DIR = os.getenv("COMPILED_FOREST_DIR", "disease_predictor_compiled")
+LEGACY_COMPILED_PREPROCESSOR_PATH = os.getenv("COMPILED_PREPROCESSOR_PATH", "preprocessor_compiled.json")
+
+# Missing active versions already warned about (serving checks the active version on every prediction)
+_missing_warned = set()
+
+
+def version_dir(version):
+    return os.path.join(REGISTRY_DIR, version)
+
+
+def is_registered(version):
+    """Whether a version has been fully written (not a .tmp directory of an unfinished registration)."""
+    return (
+        bool(version) and not version.endswith(".tmp")
+        and os.path.isfile(os.path.join(REGISTRY_DIR, version, METADATA_FILE))
+    )
+
+
+def list_versions():
+    """All registered versions, oldest first."""
+    if not os.path.isdir(REGISTRY_DIR):
+        return []
+    return sorted(name for name in os.listdir(REGISTRY_DIR) if is_registered(name))
+
+
+def active_version():
+    """The version currently served, or None if nothing has been registered.
+
+    If ACTIVE names a version that is no longer in the registry, the newest
+    registered version is served instead (or the legacy pickles, if none is).
+    """
+    try:
+        with open(os.path.join(REGISTRY_DIR, ACTIVE_FILE)) as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    if not version:
+        return None
+    if not is_registered(version):
+        versions = list_versions()
+        fallback = versions[-1] if versions else None
+        if version not in _missing_warned:
+            _missing_warned.add(version)
+            logging.warning(f"Active model version {version} is missing from {REGISTRY_DIR}; "
+                            f"serving {fallback or 'the legacy pickles'} instead")
+        return fallback
+    return version
+
+
+def set_active(version):
+    """Point serving at a registered version (atomic, safe while the app is running)."""
+    if not is_registered(version):
+        raise ValueError(f"Unknown model version: {version}")
+    tmp_path = os.path.join(REGISTRY_DIR, f"{ACTIVE_FILE}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(REGISTRY_DIR, ACTIVE_FILE))
+
+
+def load_metadata(version=None):
+    """Metadata of a version (the active one by default), or None if there is none."""
+    version = version or active_version()
+    if version is None:
+        return None
+    with open(os.path.join(version_dir(version), METADATA_FILE)) as f:
+        return json.load(f)
+
+
+def artifact_paths(version=None):
+    """Files to serve for a version (the active one by default).
+
+    Falls back to the legacy pickles in the repo root when no version is active.
+    """
+    version = version or active_version()
+    if version is None:
+        return {
+            "version": None,
+            "preprocessor": LEGACY_PREPROCESSOR_PATH,
+            "model": LEGACY_MODEL_PATH,
+            "compiled": LEGACY_COMPILED_DIR,
+            "compiled_preprocessor": LEGACY_COMPILED_PREPROCESSOR_PATH,
+        }
+    directory = version_dir(version)
+    return {
+        "version": version,
+        "preprocessor": os.path.join(directory, PREPROCESSOR_FILE),
+        "model": os.path.join(directory, MODEL_FILE),
+        "compiled": os.path.join(directory, COMPILED_DIR),
+        "compiled_preprocessor": os.path.join(directory, COMPILED_PREPROCESSOR_FILE),
+    }
+
+
+def register_version(preprocessor, model, metadata, activate=True):
+    """Save a trained preprocessor/model pair as a new immutable version.
+
+    The version directory is written under a temporary name and renamed into
+    place, so serving never sees a half-written version. Versions trained in
+    the same second get a -2, -3, ... suffix.
+    """
+    from compiled_forest import CompiledForest, artifact_hash
+    from compiled_preprocessor import CompiledPreprocessor
+
+    trained_at = datetime.now()
+    base_version = trained_at.strftime("%Y%m%d-%H%M%S")
+    if metadata.get("data_hash"):
+        base_version += f"-{metadata['data_hash'][:8]}"
+
+    # Claim a name no other run is using: creating the temporary directory fails if it is taken
+    os.makedirs(REGISTRY_DIR, exist_ok=True)
+    suffix = 1
+    while True:
+        version = base_version if suffix == 1 else f"{base_version}-{suffix}"
+        final_dir = version_dir(version)
+        tmp_dir = f"{final_dir}.tmp"
+        if not os.path.exists(final_dir):
+            try:
+                os.mkdir(tmp_dir)
+                break
+            except FileExistsError:
+                pass
+        suffix += 1
+
+    try:
+        preprocessor_path = os.path.join(tmp_dir, PREPROCESSOR_FILE)
+        joblib.dump(preprocessor, preprocessor_path)
+        CompiledPreprocessor.from_preprocessor(preprocessor).save(
+            os.path.join(tmp_dir, COMPILED_PREPROCESSOR_FILE), source=artifact_hash(preprocessor_path)
+        )
+        model_path = os.path.join(tmp_dir, MODEL_FILE)
+        joblib.dump(model, model_path)
+        CompiledForest.from_model(model).save(
+            os.path.join(tmp_dir, COMPILED_DIR), source=artifact_hash(model_path)
+        )
+
+        metadata = {
+            "version": version,
+            "trained_at": trained_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "feature_names": list(getattr(preprocessor, "feature_names_in_", [])),
+            "classes": [str(c) for c in getattr(model, "classes_", [])],
+            "model_params": {k: v for k, v in model.get_params().items() if isinstance(v, (int, float, str, bool, type(None)))},
+            **metadata,
+        }
+        with open(os.path.join(tmp_dir, METADATA_FILE), "w") as f:
+            json.dump(metadata, f, indent=2)
+
+        os.replace(tmp_dir, final_dir)
+    except BaseException:
+        # Free the name for the next run
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    if activate:
+        set_active(version)
+    return version
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+
+    if command == "list":
+        current = active_version()
+        for version in list_versions():
+            meta = load_metadata(version)
+            marker = "*" if version == current else " "
+            print(f"{marker} {version}  accuracy={meta.get('accuracy', 0) * 100:.2f}%  trained_at={meta.get('trained_at')}")
+        if current is None:
+            print("No active version: serving the legacy pickles in the repo root.")
+    elif command == "activate" and len(sys.argv) > 2:
+        set_active(sys.argv[2])
+        print(f"✅ Active model version: {sys.argv[2]}")
+    else:
+        print("Usage: python model_registry.py [list | activate <version>]")
@@ -1,6 +1,6 @@
 import streamlit as st
 from pearl_response import get_response
-from translate_input import trans_text
+from translate_input import trans_text_batch
 from language_codes import LANGUAGES
 
 def main():
@@ -25,9 +25,14 @@ def main():
         st.warning("Please select a valid language code (e.g., 'en', 'fr', 'es').")
         return
 
-    st.markdown(
-        f"**{trans_text('I am Dr. Pearl. Please describe how you feel as detailed as you can. Remember, health is wealth.', lang)}**"
-    )
+    # Translate all of the page's labels in one batch
+    intro_text, input_label, goodbye_text = trans_text_batch([
+        'I am Dr. Pearl. Please describe how you feel as detailed as you can. Remember, health is wealth.',
+        "💬 Type your message:",
+        "Goodbye! Stay healthy!",
+    ], lang)
+
+    st.markdown(f"**{intro_text}**")
 
     # --- CUSTOM STYLES ---
     st.markdown("""
@@ -95,7 +100,7 @@ def main():
 
     # --- INPUT BOX (STICKY AT BOTTOM) ---
     st.markdown('<div class="bottom-input">', unsafe_allow_html=True)
-    user_input = st.text_input(trans_text("💬 Type your message:", lang), key="user_input")
+    user_input = st.text_input(input_label, key="user_input")
     st.markdown('</div>', unsafe_allow_html=True)
 
     # --- HANDLE INPUT ---
@@ -103,7 +108,7 @@ def main():
         st.session_state.last_user_input = user_input  # Prevent double-send
 
         if user_input.lower() == 'exit':
-            st.success(trans_text("Goodbye! Stay healthy!", lang))
+            st.success(goodbye_text)
             st.session_state.chat_history = []
             st.session_state.last_user_input = ""
             st.stop()
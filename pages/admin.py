@@ -2,8 +2,17 @@ import streamlit as st
 import pandas as pd
 import sqlite3
 import plotly.express as px
-from store_pipeline import get_all_bookings, get_all_predictions
+from store_pipeline import (
+    get_page, table_columns, count_predictions_by_disease, sum_symptoms, summarise_predictions,
+    booking_date_range, daily_bookings, count_bookings_by, tag_values, top_tags, summarise_bookings,
+)
+from store_export import export_table, EXPORT_FORMATS
 import datetime
+import tempfile
+import os
+
+# Rows per page when browsing the tables
+PAGE_SIZE = 100
 
 st.set_page_config(page_title="Admin Dashboard", layout="wide")
 
@@ -17,16 +26,68 @@ if access_code != "ADMIN999":
     st.warning("Enter valid access code to view data")
     st.stop()
 
-# --- LOAD DATA ---
-bookings = get_all_bookings()
-predictions = get_all_predictions()
-
-predictions.rename(columns={"predicted_disease": "Predicted_Disease"}, inplace=True)
-
 # st.write("Predictions columns:", predictions.columns.tolist())
 # st.write("Predictions rows:", predictions.shape[0])
 
 
+def show_page(table_name):
+    """Browse a table newest first, one keyset page at a time."""
+    cursors = st.session_state.setdefault(f"{table_name}_cursors", [None])
+    page = get_page(table_name, PAGE_SIZE, cursors[-1])
+    st.dataframe(page, use_container_width=True)
+
+    col_newer, col_info, col_older = st.columns([1, 2, 1])
+    with col_newer:
+        if len(cursors) > 1 and st.button("◀ Newer", key=f"{table_name}_newer"):
+            cursors.pop()
+            st.rerun()
+    with col_info:
+        st.caption(f"Page {len(cursors)} · {len(page)} rows")
+    with col_older:
+        if len(page) == PAGE_SIZE and st.button("Older ▶", key=f"{table_name}_older"):
+            cursors.append(int(page["id"].min()))
+            st.rerun()
+
+
+def _discard_export(state_key):
+    """Delete a prepared export file once it has been downloaded (or replaced)."""
+    prepared = st.session_state.pop(state_key, None)
+    if prepared and os.path.exists(prepared[0]):
+        os.remove(prepared[0])
+
+
+def export_controls(table_name):
+    """Export a table on request, streamed from the database into a temp file, then offer it for download.
+
+    Only the file's path is kept in the session; the file is read when the
+    download is served and deleted after it.
+    """
+    state_key = f"{table_name}_export_file"
+    with st.expander("📥 Download"):
+        columns = st.multiselect("Columns (default: all)", table_columns(table_name),
+                                 key=f"{table_name}_export_columns")
+        dates = None
+        if st.checkbox("Only a date range", key=f"{table_name}_export_limit"):
+            dates = st.date_input("Dates", value=(datetime.date.today() - datetime.timedelta(days=30),
+                                                  datetime.date.today()), key=f"{table_name}_export_dates")
+        fmt = st.radio("Format", EXPORT_FORMATS, horizontal=True, key=f"{table_name}_export_format")
+
+        if st.button("Prepare download", key=f"{table_name}_export"):
+            _discard_export(state_key)
+            start, end = (dates if isinstance(dates, tuple) and len(dates) == 2 else (None, None))
+            fd, path = tempfile.mkstemp(prefix=f"{table_name}-", suffix=f".{fmt}")
+            os.close(fd)
+            rows = export_table(table_name, path, columns or None, start, end)
+            st.session_state[state_key] = (path, f"{table_name}.{fmt}", rows)
+
+        prepared = st.session_state.get(state_key)
+        if prepared and os.path.exists(prepared[0]):
+            path, file_name, rows = prepared
+            with open(path, "rb") as f:
+                st.download_button(f"📥 Download {file_name} ({rows:,} rows)", f, file_name,
+                                   key=f"{table_name}_download", on_click=_discard_export, args=(state_key,))
+
+
 # --- TABS FOR NAVIGATION ---
 tab1, tab2, tab3, tab4 = st.tabs(["📘 Bookings Data", "🧠 Predictions Data", "📈 Insights Dashboard - Predictions", "📈 Insights Dashboard - Booking"])
 
@@ -35,18 +96,18 @@ tab1, tab2, tab3, tab4 = st.tabs(["📘 Bookings Data", "🧠 Predictions Data",
 # ==========================
 with tab1:
     st.subheader("Bookings Data Overview")
-    st.dataframe(bookings, use_container_width=True)
+    show_page("bookings")
 
-    st.download_button("📥 Download Bookings CSV", bookings.to_csv(index=False), "bookings.csv")
+    export_controls("bookings")
 
 # ==========================
 # TAB 2: PREDICTIONS DATA
 # ==========================
 with tab2:
     st.subheader("Predictions Data Overview")
-    st.dataframe(predictions, use_container_width=True)
+    show_page("predictions")
 
-    st.download_button("📥 Download Predictions CSV", predictions.to_csv(index=False), "predictions.csv")
+    export_controls("predictions")
 
 # ==========================
 # TAB 3: INSIGHTS DASHBOARD
@@ -54,12 +115,11 @@ with tab2:
 with tab3:
     st.subheader("📊 Interactive Data Insights")
 
-    if predictions.empty:
+    # Counts and symptom totals come from the daily rollups; statistics are computed by the database
+    disease_counts = count_predictions_by_disease()
+    if disease_counts.empty:
         st.warning("No prediction data available.")
     else:
-        # --- COPY DATA ---
-        df_filtered = predictions.copy()
-
         # --- FILTERS ---
         with st.expander("🔍 Filters"):
             colf1, colf2, colf3 = st.columns(3)
@@ -67,49 +127,34 @@ with tab3:
             with colf1:
                 disease_filter = st.multiselect(
                     "Filter by Disease:",
-                    options=df_filtered["Predicted_Disease"].dropna().unique(),
+                    options=disease_counts["predicted_disease"].dropna().tolist(),
                     default=None
                 )
 
         # --- APPLY FILTERS ---
         if disease_filter:
-            df_filtered = df_filtered[df_filtered["Predicted_Disease"].isin(disease_filter)]
+            disease_counts = count_predictions_by_disease(disease_filter)
 
         # --- VISUALS ---
         col1, col2 = st.columns(2)
 
         # 1️⃣ Disease Distribution
         with col1:
-            if "Predicted_Disease" in df_filtered.columns:
-                disease_count = df_filtered["Predicted_Disease"].value_counts().reset_index()
-                disease_count.columns = ["Predicted_Disease", "Count"]
-                fig1 = px.bar(
-                    disease_count, x="Predicted_Disease", y="Count",
-                    color="Predicted_Disease", title="🧬 Disease Distribution", text_auto=True
-                )
-                st.plotly_chart(fig1, use_container_width=True)
-            else:
-                st.info("No disease data found.")
+            disease_count = disease_counts.rename(columns={"predicted_disease": "Predicted_Disease", "count": "Count"})
+            fig1 = px.bar(
+                disease_count, x="Predicted_Disease", y="Count",
+                color="Predicted_Disease", title="🧬 Disease Distribution", text_auto=True
+            )
+            st.plotly_chart(fig1, use_container_width=True)
 
         # 2️⃣ Symptom Count Visualization
         with col2:
-            symptom_cols = [
-                "fever", "cough", "headache", "fatigue", "nausea", "muscle_pain",
-                "shortness_of_breath", "loss_of_taste", "abdominal_pain",
-                "appetite_loss", "frequent_urination", "thirst_level", "blurred_vision"
-            ]
-            available_symptoms = [c for c in symptom_cols if c in df_filtered.columns]
-
-            if available_symptoms:
-                symptom_sums = df_filtered[available_symptoms].sum().reset_index()
-                symptom_sums.columns = ["Symptom", "Count"]
-                fig2 = px.bar(
-                    symptom_sums, x="Symptom", y="Count", color="Symptom",
-                    title="💊 Symptom Frequency Across Patients", text_auto=True
-                )
-                st.plotly_chart(fig2, use_container_width=True)
-            else:
-                st.info("No symptom columns found in dataset.")
+            symptom_sums = sum_symptoms(disease_filter).rename(columns={"symptom": "Symptom", "count": "Count"})
+            fig2 = px.bar(
+                symptom_sums, x="Symptom", y="Count", color="Symptom",
+                title="💊 Symptom Frequency Across Patients", text_auto=True
+            )
+            st.plotly_chart(fig2, use_container_width=True)
 
         # --- SECOND ROW ---
         col3, col4, col5 = st.columns(3)
@@ -131,35 +176,24 @@ with tab3:
         # --- SUMMARY ---
         st.markdown("---")
         st.markdown("### 📈 Summary Statistics")
-        st.write(df_filtered.describe())
+        st.write(summarise_predictions(disease_filter))
 
 
 # 🗓️ Booking Insights & Patient Trends
 with tab4:
     st.subheader("🗓️ Booking Insights & Patient Trends")
 
-    if bookings.empty:
+    # Every chart and the summary below is a query on the rollups, tags or indexed columns
+    first_booking, last_booking = booking_date_range()
+    if first_booking is None:
         st.warning("No booking data available.")
     else:
-        df_book = bookings.copy()
-        df_book["submitted_on"] = pd.to_datetime(df_book["submitted_on"], errors="coerce")
-
         # --- FILTERS ---
         colf1, colf2, colf3 = st.columns(3)
 
-
         # 📅 DATE FILTER
-  # --- FILTERS ---
-
-
-# 📅 DATE FILTER
         with colf1:
-            valid_dates = df_book["submitted_on"].dropna()
-            if not valid_dates.empty:
-                min_date, max_date = valid_dates.min().date(), valid_dates.max().date()
-            else:
-                today = pd.Timestamp.today().date()
-                min_date = max_date = today
+            min_date, max_date = first_booking.date(), last_booking.date()
 
             default_value = (min_date, max_date) if min_date != max_date else min_date
 
@@ -170,16 +204,14 @@ with tab4:
                 max_value=max_date
             )
 
-            if isinstance(selected_dates, tuple):
+            if isinstance(selected_dates, tuple) and len(selected_dates) == 2:
                 start_date, end_date = selected_dates
+            elif isinstance(selected_dates, tuple):
+                # Range still being picked: only its first day so far
+                start_date = end_date = selected_dates[0] if selected_dates else min_date
             else:
                 start_date = end_date = selected_dates
 
-            df_book = df_book[
-                (df_book["submitted_on"].dt.date >= start_date)
-                & (df_book["submitted_on"].dt.date <= end_date)
-            ]
-
         # 👩 GENDER FILTER
         # with colf2:
         #     gender_options = ["All"]
@@ -192,40 +224,20 @@ with tab4:
             #     df_book = df_book[df_book["gender"] == selected_gender]
 
         # 💨 ALLERGY / LIFESTYLE FILTER
+        # Required tags, as {field: tag}, for the queries below
+        tags = {}
         with colf2:
             filter_type = st.radio("Filter By", ["Allergies", "Smoking/Alcohol"], horizontal=True)
 
-            if filter_type == "Allergies" and "allergies" in df_book.columns:
-                allergy_options = ["All"] + sorted(
-                    set(
-                        allergy.strip()
-                        for sublist in df_book["allergies"]
-                        .dropna()
-                        .astype(str)
-                        .str.replace("and", ",", regex=False)
-                        .str.split(",")
-                        for allergy in sublist
-                    )
-                )
-                selected_allergy = st.selectbox("Select Allergy", allergy_options)
+            if filter_type == "Allergies":
+                selected_allergy = st.selectbox("Select Allergy", ["All"] + tag_values("allergies"))
                 if selected_allergy != "All":
-                    df_book = df_book[df_book["allergies"].str.contains(selected_allergy, case=False, na=False)]
-
-            elif filter_type == "Smoking/Alcohol" and "smoke_or_alcohol" in df_book.columns:
-                habit_options = ["All"] + sorted(
-                    set(
-                        habit.strip()
-                        for sublist in df_book["smoke_or_alcohol"]
-                        .dropna()
-                        .astype(str)
-                        .str.replace("and", ",", regex=False)
-                        .str.split(",")
-                        for habit in sublist
-                    )
-                )
-                selected_habit = st.selectbox("Select Habit", habit_options)
+                    tags["allergies"] = selected_allergy
+
+            elif filter_type == "Smoking/Alcohol":
+                selected_habit = st.selectbox("Select Habit", ["All"] + tag_values("smoke_or_alcohol"))
                 if selected_habit != "All":
-                    df_book = df_book[df_book["smoke_or_alcohol"].str.contains(selected_habit, case=False, na=False)]
+                    tags["smoke_or_alcohol"] = selected_habit
 
         st.markdown("---")
 
@@ -253,18 +265,17 @@ with tab4:
 
 
 
-        # --- APPLY FILTERS ---
-        df_book = df_book[
-            (df_book["submitted_on"].dt.date >= start_date)
-            & (df_book["submitted_on"].dt.date <= end_date)
-        ]
         # if selected_gender != "All":
         #     df_book = df_book[df_book["gender"] == selected_gender]
 
         st.markdown("---")
 
+        bookings_per_day = daily_bookings(start_date, end_date, tags).rename(
+            columns={"day": "submitted_on", "count": "Count"}
+        )
+
         # ✅ VISUALS STILL SHOW EVEN IF DATA IS EMPTY
-        if df_book.empty:
+        if bookings_per_day.empty:
             st.info("No records match your selected filters.")
         else:
             # === FIRST ROW ===
@@ -272,12 +283,6 @@ with tab4:
 
             with col1:
                 # 📅 Daily Bookings Trend
-                bookings_per_day = (
-                    df_book.groupby(df_book["submitted_on"].dt.date)
-                    .size()
-                    .reset_index(name="Count")
-                    .sort_values("submitted_on")
-                )
                 bookings_per_day["Rolling_Avg"] = (
                     bookings_per_day["Count"].rolling(window=7, min_periods=1).mean()
                 )
@@ -304,94 +309,53 @@ with tab4:
 
             with col2:
                 # 🧠 Health Problems
-                if "problem" in df_book.columns:
-                    problem_split = (
-                        df_book["problem"]
-                        .dropna()
-                        .astype(str)
-                        .str.replace("and", ",", regex=False)
-                        .str.replace(r"[\[\]']", "", regex=True)
-                        .str.split(",")
-                        .explode()
-                        .str.strip()
-                        .value_counts()
-                        .head(10)
-                        .reset_index()
-                    )
-                    problem_split.columns = ["Health_Issue", "Count"]
-                    fig2 = px.bar(
-                        problem_split,
-                        x="Health_Issue",
-                        y="Count",
-                        title="Top 10 Reported Health Issues",
-                        text_auto=True,
-                    )
-                    st.plotly_chart(fig2, use_container_width=True)
+                problem_split = top_tags("problem", 10, start_date, end_date, tags)
+                problem_split.columns = ["Health_Issue", "Count"]
+                fig2 = px.bar(
+                    problem_split,
+                    x="Health_Issue",
+                    y="Count",
+                    title="Top 10 Reported Health Issues",
+                    text_auto=True,
+                )
+                st.plotly_chart(fig2, use_container_width=True)
 
             # === SECOND ROW ===
             col3, col4 = st.columns(2)
 
             with col3:
                 # 🤧 Common Allergies
-                if "allergies" in df_book.columns:
-                    allergy_split = (
-                        df_book["allergies"]
-                        .dropna()
-                        .astype(str)
-                        .str.replace("and", ",", regex=False)
-                        .str.split(",")
-                        .explode()
-                        .str.strip()
-                        .value_counts()
-                        .head(10)
-                        .reset_index()
-                    )
-                    allergy_split.columns = ["Allergy", "Count"]
-                    fig3 = px.bar(
-                        allergy_split,
-                        x="Allergy",
-                        y="Count",
-                        title="Most Common Allergies",
-                        text_auto=True,
-                        color="Allergy",
-                    )
-                    st.plotly_chart(fig3, use_container_width=True)
+                allergy_split = top_tags("allergies", 10, start_date, end_date, tags)
+                allergy_split.columns = ["Allergy", "Count"]
+                fig3 = px.bar(
+                    allergy_split,
+                    x="Allergy",
+                    y="Count",
+                    title="Most Common Allergies",
+                    text_auto=True,
+                    color="Allergy",
+                )
+                st.plotly_chart(fig3, use_container_width=True)
 
             with col4:
                 # 🚬 Lifestyle Habits
-                if "smoke_or_alcohol" in df_book.columns:
-                    lifestyle_split = (
-                        df_book["smoke_or_alcohol"]
-                        .dropna()
-                        .astype(str)
-                        .str.replace("and", ",", regex=False)
-                        .str.split(",")
-                        .explode()
-                        .str.strip()
-                        .value_counts()
-                        .reset_index()
-                    )
-                    lifestyle_split.columns = ["Habit", "Count"]
-                    fig4 = px.bar(
-                        lifestyle_split,
-                        x="Habit",
-                        y="Count",
-                        title="Smoking or Alcohol Usage",
-                        text_auto=True,
-                        color="Habit",
-                    )
-                    st.plotly_chart(fig4, use_container_width=True)
+                lifestyle_split = top_tags("smoke_or_alcohol", None, start_date, end_date, tags)
+                lifestyle_split.columns = ["Habit", "Count"]
+                fig4 = px.bar(
+                    lifestyle_split,
+                    x="Habit",
+                    y="Count",
+                    title="Smoking or Alcohol Usage",
+                    text_auto=True,
+                    color="Habit",
+                )
+                st.plotly_chart(fig4, use_container_width=True)
 
         # --- WOMEN STATUS ---
         st.markdown("---")
         st.markdown("### 🤰 Women Status Distribution")
-        if "women_status" in df_book.columns:
-            women_status_count = (
-                df_book["women_status"]
-                .value_counts()
-                .reset_index()
-                .rename(columns={"index": "Status", "women_status": "Count"})
-            )
+        women_status_count = count_bookings_by("women_status", start_date, end_date, tags).dropna()
+        if not women_status_count.empty:
             women_status_count.columns = ["Status", "Count"]
 
             fig5 = px.pie(
@@ -403,9 +367,9 @@ with tab4:
             )
             st.plotly_chart(fig5, use_container_width=True)
         else:
-            st.info("No 'Women_Status' column found in booking records.")
+            st.info("No 'Women_Status' values in the selected bookings.")
 
         # --- SUMMARY ---
         st.markdown("---")
         st.markdown("### 📈 Summary Stats")
-        st.write(df_book.describe(include='all'))
+        st.write(summarise_bookings(start_date, end_date, tags))
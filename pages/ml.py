@@ -1,9 +1,9 @@
 import streamlit as st
 from datetime import datetime
-from prediction_pipeline import process_prediction  #  ML pipeline
-from train import accuracy
+from prediction_pipeline import prediction_cache_stats  #  ML pipeline
+from prediction_service import predict_patient, PREDICTION_SERVICE_URL
+from model_registry import load_metadata
 from store_pipeline import save_predictions_to_db
-from store_pipeline import init_supabase_db
 import pandas as pd
 
 
@@ -38,10 +38,13 @@ if not st.session_state.authenticated:
         else:
             st.error("❌ Invalid code. Please try again.")
 else:
-    init_supabase_db()
     st.title("🧬 Disease Prediction Assistant")
     st.write("Enter patient details and symptoms below:")
-    st.write(f'model has { accuracy}% accuracy')
+    metadata = load_metadata()
+    if metadata:
+        st.write(f'model has {metadata["accuracy"] * 100:.2f}% accuracy (version {metadata["version"]})')
+    else:
+        st.write("model accuracy unknown: run train.py to register a model version")
 
     # --- Patient Basic Info ---
     st.header("👤 Patient Information")
@@ -102,39 +105,43 @@ else:
         df = pd.DataFrame(data)
         st.write("### 🧾 Data Preview")
         st.dataframe(df)
-        df.to_csv("user_input_ml.csv")
 
         # Send to ML or database pipeline
-    try:
-        modified_data, result = process_prediction(file_path="user_input_ml.csv")
-        st.dataframe(modified_data)
-        st.success(f"✅ Pipeline executed successfully! Result: {result[0]}")
-
-        #Save Prediction to database
-        pred_data = {
-            #"Name": "Anonymous",  # Patients remain anonymous
-            "Age": age,
-            "Gender": gender,
-            "Fever": fever,
-            "Cough": cough,
-            "Headache": headache,
-            "Fatigue": fatigue,
-            "Nausea": nausea,
-            "Muscle_Pain": muscle_pain,
-            "Shortness_of_Breath": shortness_of_breath,
-            "Loss_of_Taste": loss_of_taste,
-            "Abdominal_Pain": abdominal_pain,
-            "Appetite_Loss": appetite_loss,
-            "Frequent_Urination": frequent_urination,
-            "Thirst_Level": thirst_level,
-            "Blurred_Vision": blurred_vision,
-            "Symptom_Duration_Days": symptom_duration,
-            "Severity": severity,
-            "Predicted_Disease": result[0]
-        }
-
-        save_predictions_to_db(pred_data)    
-
-        
-    except Exception as e:
-        st.error(f"❌ Error in pipeline: {e}")
\ No newline at end of file
+        try:
+            # Goes through the local prediction service when PREDICTION_SERVICE_URL is set
+            modified_data, result = predict_patient(df)
+            st.dataframe(modified_data)
+            st.success(f"✅ Pipeline executed successfully! Result: {result[0]}")
+            if not PREDICTION_SERVICE_URL:
+                cache = prediction_cache_stats()
+                st.caption(f"Prediction cache hit rate: {cache['hit_rate']:.0%} "
+                           f"({cache['hits']} of {cache['hits'] + cache['misses']} predictions)")
+
+            #Save Prediction to database
+            pred_data = {
+                #"Name": "Anonymous",  # Patients remain anonymous
+                "Age": age,
+                "Gender": gender,
+                "Fever": fever,
+                "Cough": cough,
+                "Headache": headache,
+                "Fatigue": fatigue,
+                "Nausea": nausea,
+                "Muscle_Pain": muscle_pain,
+                "Shortness_of_Breath": shortness_of_breath,
+                "Loss_of_Taste": loss_of_taste,
+                "Abdominal_Pain": abdominal_pain,
+                "Appetite_Loss": appetite_loss,
+                "Frequent_Urination": frequent_urination,
+                "Thirst_Level": thirst_level,
+                "Blurred_Vision": blurred_vision,
+                "Symptom_Duration_Days": symptom_duration,
+                "Severity": severity,
+                "Predicted_Disease": result[0]
+            }
+
+            save_predictions_to_db(pred_data)    
+
+            
+        except Exception as e:
+            st.error(f"❌ Error in pipeline: {e}")
@@ -1,31 +1,376 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
 import joblib
+import numpy as np
 import pandas as pd
+from compiled_forest import CompiledForest, artifact_hash
+from compiled_preprocessor import CompiledPreprocessor
+from model_registry import artifact_paths
+from resource_usage import resident_memory
 
-# Load saved preprocessor and model
-preprocessor = joblib.load("preprocessor.pkl")
-model = joblib.load("disease_predictor.pkl")
+# --- SERVING SETTINGS ---
+USE_COMPILED_FOREST = os.getenv("USE_COMPILED_FOREST", "1") == "1"
+# NumPy index-map transform in place of the sklearn ColumnTransformer
+USE_COMPILED_PREPROCESSOR = os.getenv("USE_COMPILED_PREPROCESSOR", "1") == "1"
+# Above this many rows sklearn's Cython tree walk beats the NumPy evaluator
+COMPILED_FOREST_MAX_ROWS = int(os.getenv("COMPILED_FOREST_MAX_ROWS", 256))
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", 4096))
+# Memory-map array artifacts so every worker process shares one page-cached copy
+MODEL_MMAP_MODE = "r" if os.getenv("MODEL_MMAP", "1") == "1" else None
 
-def process_prediction(file_path, preprocessor=preprocessor, model=model):
-    # Read and clean new patient data
-    new_patient = pd.read_csv(file_path)
-    new_patient = new_patient.loc[:, ~new_patient.columns.str.contains('^Unnamed')]
 
-    # Ensure the columns match what the preprocessor expects
+class PredictionCache:
+    """Bounded LRU of single-patient results keyed on the canonical feature vector."""
+
+    def __init__(self, max_entries=PREDICTION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry, e.g. because the model changed."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "invalidations": self.invalidations,
+            }
+
+
+_prediction_cache = PredictionCache()
+
+
+def prediction_cache_stats():
+    """Hit/miss counters of the prediction cache."""
+    return _prediction_cache.stats()
+
+
+# --- MODEL ARTIFACTS ---
+# Nothing is loaded at import: the active version is loaded on first use.
+# Single-row scoring only needs the compiled preprocessor and the
+# memory-mapped compiled forest; the sklearn forest is unpickled only if
+# it is actually needed (large batches, or no up-to-date compiled export).
+# A missing or stale export is compiled once and written next to the
+# pickles, so the other workers map that file instead of compiling their own.
+_artifacts = None
+_artifacts_lock = threading.RLock()
+
+
+def _load_artifacts(paths):
+    """Load the preprocessor and the array-based copy of the forest for a version."""
+    before = resident_memory()
+    preprocessor = _load_preprocessor(paths)
+
+    artifacts = {
+        "version": paths["version"],
+        "paths": paths,
+        "preprocessor": preprocessor,
+        "model": None,
+        "compiled_model": None,
+        "layout": (_expected_columns(preprocessor), _output_columns(preprocessor)),
+        "memory": {"before": before},
+    }
+    if USE_COMPILED_FOREST:
+        source = artifact_hash(paths["model"])
+        compiled_model = _load_compiled_forest(paths["compiled"], source)
+        if compiled_model is None:
+            compiled_model = _persist_compiled_forest(
+                CompiledForest.from_model(_load_model(artifacts)), paths["compiled"], source
+            )
+        artifacts["compiled_model"] = compiled_model
+    # Taken after any export written above, so writing it doesn't count as a change
+    artifacts["fingerprint"] = _fingerprint(paths)
+
+    artifacts["memory"]["after"] = resident_memory()
+    logging.info(
+        f"Model {paths['version'] or 'legacy'} loaded: "
+        f"RSS {before['rss']:.1f}MB -> {artifacts['memory']['after']['rss']:.1f}MB"
+    )
+    return artifacts
+
+
+def _load_compiled_forest(directory, source):
+    """The memory-mapped compiled export in ``directory``, or None if there is none compiled from ``source``."""
+    if not os.path.isfile(os.path.join(directory, "forest.json")):
+        return None
+    compiled_model = CompiledForest.load(directory, mmap_mode=MODEL_MMAP_MODE)
+    return compiled_model if compiled_model.source == source else None
+
+
+def _persist_compiled_forest(forest, directory, source):
+    """Write a freshly compiled forest for the other workers and map it; keep it in memory if that fails."""
+    try:
+        forest.save_atomic(directory, source=source)
+        logging.info(f"Compiled forest written to {directory}")
+        return CompiledForest.load(directory, mmap_mode=MODEL_MMAP_MODE)
+    except OSError as e:
+        # Another worker may have published the same export first
+        existing = _load_compiled_forest(directory, source)
+        if existing is not None:
+            return existing
+        logging.warning(f"Could not write the compiled forest to {directory}, so every worker compiles its own "
+                        f"copy: {e}. Build it with: python compiled_forest.py <model.pkl> {directory}")
+        forest.source = source
+        return forest
+
+
+def _load_preprocessor(paths):
+    """Serving preprocessor: the compiled export if it is current, else the pickle (compiled and written out)."""
+    if not USE_COMPILED_PREPROCESSOR:
+        return joblib.load(paths["preprocessor"])
+
+    source = artifact_hash(paths["preprocessor"])
+    if os.path.isfile(paths["compiled_preprocessor"]):
+        compiled = CompiledPreprocessor.load(paths["compiled_preprocessor"])
+        if compiled.source == source:
+            return compiled
+
+    preprocessor = joblib.load(paths["preprocessor"])
+    try:
+        compiled = CompiledPreprocessor.from_preprocessor(preprocessor)
+    except ValueError as e:
+        logging.warning(f"Serving the sklearn preprocessor: {e}")
+        return preprocessor
+    compiled.source = source
+    tmp_path = f"{paths['compiled_preprocessor']}.tmp-{os.getpid()}"
+    try:
+        compiled.save(tmp_path, source=source)
+        os.replace(tmp_path, paths["compiled_preprocessor"])
+    except OSError as e:
+        logging.warning(f"Could not write the compiled preprocessor to {paths['compiled_preprocessor']}: {e}")
+    return compiled
+
+
+def _load_model(artifacts):
+    """Unpickle the sklearn forest of a loaded version on first use."""
+    if artifacts["model"] is None:
+        with _artifacts_lock:
+            if artifacts["model"] is None:
+                artifacts["model"] = joblib.load(artifacts["paths"]["model"], mmap_mode=MODEL_MMAP_MODE)
+    return artifacts["model"]
+
+
+def _file_state(path):
+    """(inode, mtime_ns, size) of a file, or None if it can't be read; changes when the file is replaced."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+
+
+def _fingerprint(paths):
+    """Cheap stat-based identity of every file served for a version."""
+    return [
+        paths["version"],
+        _file_state(paths["preprocessor"]),
+        _file_state(paths["model"]),
+        _file_state(paths["compiled_preprocessor"]),
+        _file_state(os.path.join(paths["compiled"], "forest.json")),
+    ]
+
+
+def _current_artifacts():
+    """Artifacts of the active model version.
+
+    They are reloaded, and the prediction cache cleared, when another version
+    is activated or any served file changes: the pickles, or the compiled
+    exports that actually answer single-patient predictions.
+    """
+    global _artifacts
+    paths = artifact_paths()
+    fingerprint = _fingerprint(paths)
+    if _artifacts is None or _artifacts["fingerprint"] != fingerprint:
+        with _artifacts_lock:
+            if _artifacts is None or _artifacts["fingerprint"] != fingerprint:
+                if _artifacts is not None:
+                    _prediction_cache.clear()
+                _artifacts = _load_artifacts(paths)
+    return _artifacts
+
+
+def reload_artifacts():
+    """Load the active version's artifacts from disk again, even if they haven't changed."""
+    global _artifacts
+    with _artifacts_lock:
+        _artifacts = None
+        _prediction_cache.clear()
+        return _current_artifacts()
+
+
+def active_model_version():
+    """Registry version being served, or None for the legacy pickles."""
+    return _current_artifacts()["version"]
+
+
+def model_memory_report():
+    """Resident memory of this process before and after the active version was loaded."""
+    return _current_artifacts()["memory"]
+
+
+def get_preprocessor():
+    return _current_artifacts()["preprocessor"]
+
+
+def get_model():
+    return _load_model(_current_artifacts())
+
+
+def get_compiled_model():
+    return _current_artifacts()["compiled_model"]
+
+
+def _expected_columns(preprocessor):
+    """Input columns the preprocessor was fitted on, or None if unknown."""
     if hasattr(preprocessor, "feature_names_in_"):
-        expected_cols = list(preprocessor.feature_names_in_)
-        new_patient = new_patient[expected_cols]
+        return list(preprocessor.feature_names_in_)
+    return None
 
-    # Pass a DataFrame (not NumPy) to the preprocessor
-    X_new = preprocessor.transform(new_patient)
 
-    # Convert transformed data to DataFrame (optional, for debugging)
+def _output_columns(preprocessor):
     try:
-        encoded_feature_names = preprocessor.get_feature_names_out()
-        X_new_df = pd.DataFrame(X_new, columns=encoded_feature_names)
+        return list(preprocessor.get_feature_names_out())
     except Exception:
-        X_new_df = pd.DataFrame(X_new)
+        return None
+
+
+def preprocessor_layout(preprocessor):
+    """(input columns, encoded columns) of a preprocessor.
+
+    Resolved once per loaded version for the serving preprocessor instead of
+    on every call.
+    """
+    artifacts = _artifacts
+    if artifacts is not None and preprocessor is artifacts["preprocessor"]:
+        return artifacts["layout"]
+    return _expected_columns(preprocessor), _output_columns(preprocessor)
+
 
-    # Predict
-    prediction = model.predict(X_new)
+def to_patient_frame(data, expected_cols):
+    """Turn a CSV path, dict, DataFrame or NumPy row(s) into the preprocessor's input frame.
+
+    Dicts may hold scalars (one patient) or lists (one entry per patient).
+    NumPy rows must already be in ``expected_cols`` order.
+    """
+    if isinstance(data, (str, os.PathLike)):
+        frame = pd.read_csv(data)
+        frame = frame.loc[:, ~frame.columns.str.contains('^Unnamed')]
+    elif isinstance(data, pd.DataFrame):
+        frame = data
+    elif isinstance(data, dict):
+        if all(np.ndim(value) == 0 for value in data.values()):
+            frame = pd.DataFrame([data])
+        else:
+            frame = pd.DataFrame(data)
+    elif isinstance(data, np.ndarray):
+        if expected_cols is None:
+            raise ValueError("NumPy input needs a preprocessor with feature_names_in_")
+        rows = np.atleast_2d(data)
+        if rows.shape[1] != len(expected_cols):
+            raise ValueError(f"Expected {len(expected_cols)} values per row, got {rows.shape[1]}")
+        frame = pd.DataFrame(rows, columns=expected_cols).infer_objects()
+    else:
+        raise TypeError(f"Unsupported patient data type: {type(data).__name__}")
+
+    # Ensure the columns match what the preprocessor expects
+    if expected_cols is not None:
+        missing = [col for col in expected_cols if col not in frame.columns]
+        if missing:
+            raise ValueError(f"Missing input columns: {missing}")
+        if list(frame.columns) != expected_cols:
+            frame = frame[expected_cols]
+
+    return frame
+
+
+def _predict(X, model=None):
+    """Score a transformed matrix with the given model, or the serving model by default."""
+    if model is not None:
+        return model.predict(X)
+    compiled_model = get_compiled_model()
+    if compiled_model is not None and X.shape[0] <= COMPILED_FOREST_MAX_ROWS:
+        return compiled_model.predict(X)
+    return get_model().predict(X)
+
+
+def canonical_key(frame):
+    """Hashable key for a one-row input frame.
+
+    Numbers are rounded to 4 decimals so float noise (38.300000000000004 vs
+    38.3) maps to the same key; everything else is compared as text.
+    """
+    key = []
+    for value in frame.iloc[0].tolist():
+        if isinstance(value, (int, float, np.number)):
+            key.append(round(float(value), 4))
+        else:
+            key.append(str(value))
+    return tuple(key)
+
+
+def process_prediction(data, preprocessor=None, model=None):
+    """Predict the disease for patient data given as a CSV path, dict, DataFrame or NumPy row(s).
+
+    Single-patient calls with the serving model are memoised.
+    """
+    use_cache = preprocessor is None and model is None
+    preprocessor = preprocessor if preprocessor is not None else get_preprocessor()
+    expected_cols, encoded_cols = preprocessor_layout(preprocessor)
+    new_patient = to_patient_frame(data, expected_cols)
+
+    key = canonical_key(new_patient) if use_cache and len(new_patient) == 1 else None
+    cached = _prediction_cache.get(key) if key is not None else None
+    if cached is not None:
+        # Copies, so callers can't modify the cached arrays
+        X_new, prediction = cached[0].copy(), cached[1].copy()
+    else:
+        # Pass a DataFrame (not NumPy) to the preprocessor
+        X_new = preprocessor.transform(new_patient)
+
+        # Predict
+        prediction = _predict(X_new, model)
+        if key is not None:
+            _prediction_cache.put(key, (X_new.copy(), prediction.copy()))
+
+    # Convert transformed data to DataFrame (optional, for debugging)
+    X_new_df = pd.DataFrame(X_new, columns=encoded_cols)
 
     return X_new_df, prediction
+
+
+def predict_diseases(data, preprocessor=None, model=None):
+    """Predicted disease labels only, skipping the debug DataFrame (for batch scoring)."""
+    preprocessor = preprocessor if preprocessor is not None else get_preprocessor()
+    expected_cols, _ = preprocessor_layout(preprocessor)
+    return _predict(preprocessor.transform(to_patient_frame(data, expected_cols)), model)
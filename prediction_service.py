@@ -0,0 +1,275 @@
+import os
+import json
+import asyncio
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from prediction_pipeline import (process_prediction, active_model_version, get_compiled_model,
+                                 get_preprocessor, preprocessor_layout)
+
+# --- SERVICE SETTINGS ---
+# Empty: pages predict in-process. Set (e.g. http://127.0.0.1:8502) to use the service.
+PREDICTION_SERVICE_URL = os.getenv("PREDICTION_SERVICE_URL", "")
+PREDICTION_SERVICE_HOST = os.getenv("PREDICTION_SERVICE_HOST", "127.0.0.1")
+PREDICTION_SERVICE_PORT = int(os.getenv("PREDICTION_SERVICE_PORT", 8502))
+
+# --- BATCH SETTINGS ---
+BATCH_WINDOW_MS = float(os.getenv("PREDICTION_BATCH_WINDOW_MS", 5))
+MAX_BATCH_SIZE = int(os.getenv("PREDICTION_MAX_BATCH_SIZE", 64))
+
+# --- CLIENT SETTINGS ---
+PREDICTION_CLIENT_POOL_SIZE = int(os.getenv("PREDICTION_CLIENT_POOL_SIZE", 8))
+PREDICTION_CLIENT_TIMEOUT = float(os.getenv("PREDICTION_CLIENT_TIMEOUT", 5))
+
+
+def _score(records):
+    """Score records with one vectorised call: (features, prediction) or the exception, per record.
+
+    Records missing an input column are rejected on their own (a batched frame
+    would silently fill the gap with NaN). If the batch still fails, each
+    record is scored on its own so a bad request can't fail the others.
+    """
+    expected_cols = preprocessor_layout(get_preprocessor())[0] or []
+    results = [None] * len(records)
+    valid = []
+    for i, record in enumerate(records):
+        missing = [col for col in expected_cols if col not in record]
+        if missing:
+            results[i] = ValueError(f"Missing input columns: {missing}")
+        else:
+            valid.append(i)
+    if not valid:
+        return results
+
+    try:
+        X_df, predictions = process_prediction(pd.DataFrame.from_records([records[i] for i in valid]))
+        for i, features, prediction in zip(valid, X_df.to_dict("records"), predictions):
+            results[i] = (features, str(prediction))
+    except Exception:
+        for i in valid:
+            try:
+                X_df, predictions = process_prediction(pd.DataFrame.from_records([records[i]]))
+                results[i] = (X_df.to_dict("records")[0], str(predictions[0]))
+            except Exception as e:
+                results[i] = e
+    return results
+
+
+class MicroBatcher:
+    """Collects concurrent single-patient requests into small batches.
+
+    The first request of a batch opens a window of ``window_ms``; everything
+    that arrives before it closes (up to ``max_batch`` requests) is scored
+    with one predict call. Scoring runs on a single worker thread, so requests
+    arriving meanwhile queue up for the next batch.
+    """
+
+    def __init__(self, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH_SIZE):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.requests = 0
+        self.batches = 0
+        self._queue = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def warm_up(self):
+        """Load the model artifacts before the first request needs them."""
+        await asyncio.get_running_loop().run_in_executor(self._executor, get_compiled_model)
+
+    async def submit(self, record):
+        """Queue one patient record and wait for its (features, prediction)."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                results = await loop.run_in_executor(self._executor, _score, [record for record, _ in batch])
+            except Exception as e:
+                results = [e] * len(batch)
+            self.requests += len(batch)
+            self.batches += 1
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+        }
+
+
+_batcher = MicroBatcher()
+
+
+# --- ASGI APP ---
+async def _read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _respond(send, status, payload):
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def app(scope, receive, send):
+    """ASGI entry point: POST /predict with one patient as a JSON object, GET /health."""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                _batcher.start()
+                await _batcher.warm_up()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await _batcher.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    route = (scope["method"], scope["path"])
+    if route == ("GET", "/health"):
+        await _respond(send, 200, {"status": "ok", "model_version": active_model_version(), **_batcher.stats()})
+    elif route == ("POST", "/predict"):
+        try:
+            record = json.loads(await _read_body(receive))
+            if not isinstance(record, dict):
+                raise ValueError("Expected one patient as a JSON object")
+        except ValueError as e:
+            await _respond(send, 400, {"error": str(e)})
+            return
+        try:
+            features, prediction = await _batcher.submit(record)
+        except ValueError as e:
+            await _respond(send, 422, {"error": str(e)})
+            return
+        except Exception as e:
+            logging.warning(f"Prediction failed: {e}")
+            await _respond(send, 500, {"error": str(e)})
+            return
+        await _respond(send, 200, {"prediction": prediction, "features": features})
+    else:
+        await _respond(send, 404, {"error": "Not found"})
+
+
+# --- CLIENT ---
+class PredictionClient:
+    """Calls the prediction service over a pool of kept-alive connections."""
+
+    def __init__(self, url=PREDICTION_SERVICE_URL, pool_size=PREDICTION_CLIENT_POOL_SIZE,
+                 timeout=PREDICTION_CLIENT_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def process_prediction(self, data):
+        """Same contract as ``prediction_pipeline.process_prediction`` for one patient."""
+        record = data.to_dict("records")[0] if isinstance(data, pd.DataFrame) else dict(data)
+        record = {k: v[0] if isinstance(v, list) else v for k, v in record.items()}
+
+        response = self.session.post(f"{self.url}/predict", json=record, timeout=self.timeout)
+        if response.status_code in (400, 422):
+            raise ValueError(response.json()["error"])
+        response.raise_for_status()
+        body = response.json()
+        return pd.DataFrame([body["features"]]), np.asarray([body["prediction"]], dtype=object)
+
+    def health(self):
+        response = self.session.get(f"{self.url}/health", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PredictionClient()
+    return _client
+
+
+def predict_patient(data):
+    """Predict through the service when PREDICTION_SERVICE_URL is set, in-process otherwise.
+
+    Falls back to in-process prediction if the service can't be reached.
+    Returns (X_df, prediction) like ``process_prediction``.
+    """
+    if PREDICTION_SERVICE_URL:
+        try:
+            return get_client().process_prediction(data)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            logging.warning(f"Prediction service unavailable, predicting in-process: {e}")
+    return process_prediction(data)
+
+
+# --- RUN ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve predictions over HTTP with request micro-batching.")
+    parser.add_argument("--host", default=PREDICTION_SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=PREDICTION_SERVICE_PORT)
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("The prediction service needs uvicorn (in requirements.txt): pip install -r requirements.txt")
+
+    print(f"✅ Prediction service on http://{args.host}:{args.port} "
+          f"(batch window {BATCH_WINDOW_MS}ms, up to {MAX_BATCH_SIZE} requests)")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
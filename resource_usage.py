@@ -0,0 +1,89 @@
+import os
+import sys
+import resource
+import argparse
+from multiprocessing import get_context
+
+
+def resident_memory():
+    """Memory of the current process in MB.
+
+    ``rss`` counts every resident page; ``pss`` splits shared pages between
+    the processes mapping them, so it shows what memory-mapped artifacts
+    really cost per worker. ``pss`` and ``shared`` are only available on Linux.
+    """
+    usage = {"rss": None, "pss": None, "shared": None, "peak_rss": peak_rss()}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line and not line.startswith("0"))
+    except OSError:
+        usage["rss"] = usage["peak_rss"]
+        return usage
+
+    def mb(name):
+        return int(fields[name].split()[0]) / 1024 if name in fields else None
+
+    usage["rss"] = mb("Rss")
+    usage["pss"] = mb("Pss")
+    shared = [mb("Shared_Clean"), mb("Shared_Dirty")]
+    usage["shared"] = sum(v for v in shared if v is not None)
+    return usage
+
+
+def peak_rss():
+    """Peak resident memory of the current process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _format(usage):
+    parts = [f"{name}={value:.1f}MB" for name, value in usage.items() if value is not None]
+    return " ".join(parts)
+
+
+# --- WORKER MEMORY REPORT ---
+_SAMPLE_PATIENT = {
+    "Age": 30, "Gender": "Male", "Fever": 38.5, "Cough": 1, "Headache": 1, "Fatigue": 3,
+    "Nausea": 0, "Muscle_Pain": 2, "Shortness_of_Breath": 0, "Loss_of_Taste": 0,
+    "Abdominal_Pain": 0, "Appetite_Loss": 1, "Frequent_Urination": 0, "Thirst_Level": 0,
+    "Blurred_Vision": 0, "Symptom_Duration_Days": 3, "Severity(1-5)": 2,
+}
+
+
+def _worker(barrier, results):
+    # Importing the pipeline loads the libraries but no model artifacts
+    import prediction_pipeline
+    before = resident_memory()
+    prediction_pipeline.predict_diseases(_SAMPLE_PATIENT)
+
+    # Measure once every worker has loaded, so shared pages are split between them
+    barrier.wait()
+    results.put((os.getpid(), before, resident_memory()))
+    barrier.wait()
+
+
+def report_workers(n_workers):
+    """Start n fresh worker processes and print their memory before/after the first prediction."""
+    ctx = get_context("spawn")
+    barrier, results = ctx.Barrier(n_workers), ctx.Queue()
+    workers = [ctx.Process(target=_worker, args=(barrier, results)) for _ in range(n_workers)]
+    for worker in workers:
+        worker.start()
+
+    for _ in workers:
+        pid, before, after = results.get()
+        print(f"👷 worker {pid}")
+        print(f"   before load: {_format(before)}")
+        print(f"   after load:  {_format(after)}")
+
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report per-worker memory for loading the model.")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    report_workers(args.workers)
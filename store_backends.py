@@ -0,0 +1,738 @@
+import io
+import os
+import re
+import threading
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import (
+    create_engine, event, text, table, column, insert, inspect, MetaData, Table, Column, Integer, Float, Numeric,
+)
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+# --- BACKEND SETTINGS ---
+# Read when the backend is created, after store_pipeline has loaded .env:
+#   STORE_BACKEND      "postgres" (default, needs SUPABASE_URL) or "sqlite"; SQLite is only used when asked for
+#   STORE_SQLITE_PATH  SQLite database file
+#   STORE_SSLMODE      sslmode for Postgres connections
+DEFAULT_SQLITE_PATH = "phc_store.db"
+
+# Tables reads may name (table names can't be bound as query parameters)
+TABLES = ("bookings", "predictions")
+# When each row was recorded, for date-range reads
+TIMESTAMP_COLUMNS = {"bookings": "submitted_on", "predictions": "predicted_on"}
+
+SYMPTOM_COLUMNS = [
+    "fever", "cough", "headache", "fatigue", "nausea", "muscle_pain",
+    "shortness_of_breath", "loss_of_taste", "abdominal_pain",
+    "appetite_loss", "frequent_urination", "thirst_level", "blurred_vision",
+]
+PREDICTION_NUMERIC_COLUMNS = ["age", *SYMPTOM_COLUMNS, "symptom_duration_days", "severity"]
+# Booking columns the dashboard may group by
+BOOKING_FILTER_COLUMNS = ("allergies", "smoke_or_alcohol", "problem", "women_status")
+
+# --- BOOKING TAGS ---
+# Multi-value booking fields, also stored one value per row in booking_tags
+TAG_FIELDS = ("problem", "allergies", "smoke_or_alcohol")
+_TAG_SEPARATORS = re.compile(r"\s*(?:,|;|\band\b)\s*", re.IGNORECASE)
+
+
+def normalise_tag(tag):
+    """The stored form of a tag: trimmed, single-spaced and case-folded, so "Peanuts" and "peanuts " match."""
+    return " ".join(str(tag).split()).casefold()
+
+
+def split_tags(value):
+    """The values in a multi-value field: "Dust and Pollen, Nuts" -> ["dust", "pollen", "nuts"]."""
+    if not isinstance(value, str):
+        if value is None or pd.isna(value):
+            return []
+        value = str(value)
+    value = re.sub(r"[\[\]'\"]", "", value)
+    return list(dict.fromkeys(tag for tag in (normalise_tag(t) for t in _TAG_SEPARATORS.split(value)) if tag))
+
+
+def _tag_rows(booking_ids, records):
+    return [
+        {"booking_id": booking_id, "field": field, "tag": tag}
+        for booking_id, record in zip(booking_ids, records)
+        for field in TAG_FIELDS
+        for tag in split_tags(record.get(field))
+    ]
+
+
+def _insert_tags(conn, booking_ids, records):
+    tags = _tag_rows(booking_ids, records)
+    if tags:
+        conn.execute(text("INSERT INTO booking_tags (booking_id, field, tag) VALUES (:booking_id, :field, :tag)"), tags)
+
+
+def _backfill_booking_tags(conn):
+    """(Re)build booking_tags from the bookings table."""
+    conn.execute(text("DELETE FROM booking_tags"))
+    result = conn.execute(text(f"SELECT id, {', '.join(TAG_FIELDS)} FROM bookings ORDER BY id"))
+    for batch in iter(lambda: result.mappings().fetchmany(5000), []):
+        records = [{key.lower(): value for key, value in row.items()} for row in batch]
+        _insert_tags(conn, [record["id"] for record in records], records)
+
+
+# --- DAILY ROLLUPS ---
+# Per-day totals kept up to date by every insert and delete, so the dashboard
+# reads a few rows per day instead of the full history.
+ROLLUP_TABLES = ("daily_bookings", "daily_predictions")
+# Rows recorded without a disease are counted under this name
+UNKNOWN_DISEASE = "Unknown"
+
+_ROLLUP_SYMPTOM_SUMS = ", ".join(f"COALESCE(SUM({col}), 0)" for col in SYMPTOM_COLUMNS)
+
+# Recompute the rollups from the raw tables (backfill, or repair after out-of-band changes)
+ROLLUP_REBUILD = [
+    "DELETE FROM daily_bookings",
+    "INSERT INTO daily_bookings (day, bookings) "
+    "SELECT DATE(submitted_on), COUNT(*) FROM bookings "
+    "WHERE submitted_on IS NOT NULL GROUP BY DATE(submitted_on)",
+    "DELETE FROM daily_predictions",
+    f"INSERT INTO daily_predictions (day, predicted_disease, predictions, {', '.join(SYMPTOM_COLUMNS)}) "
+    f"SELECT DATE(predicted_on), COALESCE(predicted_disease, '{UNKNOWN_DISEASE}'), COUNT(*), {_ROLLUP_SYMPTOM_SUMS} "
+    f"FROM predictions WHERE predicted_on IS NOT NULL "
+    f"GROUP BY DATE(predicted_on), COALESCE(predicted_disease, '{UNKNOWN_DISEASE}')",
+]
+
+
+# --- SCHEMA MIGRATIONS ---
+# (version, description, statements). Append new versions; never edit applied ones.
+# {id_column} is filled in by each backend. A statement may also be a function of the
+# connection, for data changes SQL can't express the same way on every backend.
+MIGRATIONS = [
+    (1, "create bookings and predictions", [
+        """
+        CREATE TABLE IF NOT EXISTS bookings (
+            id {id_column},
+            name TEXT,
+            email TEXT,
+            gender TEXT,
+            phone_number VARCHAR(25),
+            preferred_date DATE,
+            preferred_time TEXT,
+            problem TEXT,
+            start_date TEXT,
+            current_condition_after_start TEXT,
+            severity INTEGER,
+            occured_before TEXT,
+            medication_taken TEXT,
+            fever TEXT,
+            pain TEXT,
+            cough_cold_breath_shortness TEXT,
+            change_in_appetite_weight TEXT,
+            chronic_conditions TEXT,
+            current_medication TEXT,
+            allergies TEXT,
+            past_hospitalization_surgery TEXT,
+            smoke_or_alcohol TEXT,
+            sleep_hours INTEGER,
+            exercise_frequency TEXT,
+            stress_fatigue TEXT,
+            women_status TEXT,
+            other_notes TEXT,
+            submitted_on TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS predictions (
+            id {id_column},
+            name TEXT,
+            age INTEGER,
+            gender TEXT,
+            fever REAL,
+            cough INTEGER,
+            headache INTEGER,
+            fatigue INTEGER,
+            nausea INTEGER,
+            muscle_pain INTEGER,
+            shortness_of_breath INTEGER,
+            loss_of_taste INTEGER,
+            abdominal_pain INTEGER,
+            appetite_loss INTEGER,
+            frequent_urination INTEGER,
+            thirst_level INTEGER,
+            blurred_vision INTEGER,
+            symptom_duration_days INTEGER,
+            severity INTEGER,
+            predicted_disease TEXT,
+            predicted_on TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    (2, "index dashboard filters", [
+        "CREATE INDEX IF NOT EXISTS bookings_submitted_on ON bookings (submitted_on)",
+        "CREATE INDEX IF NOT EXISTS predictions_predicted_on ON predictions (predicted_on)",
+        "CREATE INDEX IF NOT EXISTS predictions_predicted_disease ON predictions (predicted_disease)",
+    ]),
+    (3, "daily rollups", [
+        """
+        CREATE TABLE IF NOT EXISTS daily_bookings (
+            day DATE PRIMARY KEY,
+            bookings INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS daily_predictions (
+            day DATE NOT NULL,
+            predicted_disease TEXT NOT NULL,
+            predictions INTEGER NOT NULL DEFAULT 0,
+            {", ".join(f"{col} DOUBLE PRECISION NOT NULL DEFAULT 0" for col in SYMPTOM_COLUMNS)},
+            PRIMARY KEY (day, predicted_disease)
+        )
+        """,
+        *ROLLUP_REBUILD,
+    ]),
+    (4, "bulk import checkpoints", [
+        """
+        CREATE TABLE IF NOT EXISTS import_progress (
+            source TEXT PRIMARY KEY,
+            file_size BIGINT,
+            rows_loaded BIGINT NOT NULL DEFAULT 0,
+            updated_on TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    (5, "booking tags", [
+        """
+        CREATE TABLE IF NOT EXISTS booking_tags (
+            booking_id INTEGER NOT NULL,
+            field TEXT NOT NULL,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (booking_id, field, tag)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS booking_tags_field_tag ON booking_tags (field, tag, booking_id)",
+        _backfill_booking_tags,
+    ]),
+]
+
+LATEST_SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+class SQLBackend:
+    """Bookings and predictions stored through a SQLAlchemy engine.
+
+    Subclasses supply the engine and the few dialect differences (id column,
+    migration locking). Column names come back lower-case from every backend.
+    """
+
+    name = None
+    id_column = None
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    # --- SCHEMA ---
+    def schema_version(self):
+        """Latest migration applied to the database (0 if it has never been migrated)."""
+        try:
+            with self.engine.connect() as conn:
+                return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+        except (OperationalError, ProgrammingError):
+            return 0
+
+    def _lock_for_migration(self, conn):
+        """Start the migration transaction so no other process can migrate at the same time."""
+        raise NotImplementedError
+
+    def migrate(self):
+        """Apply pending migrations and record them in schema_version. Returns the versions applied.
+
+        Runs in one transaction under a lock, so concurrent processes can't
+        apply the same migration twice.
+        """
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS schema_version ("
+                "version INTEGER PRIMARY KEY, description TEXT, applied_on TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+            ))
+
+        applied = []
+        with self.engine.connect() as conn:
+            self._lock_for_migration(conn)
+            current = conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+            for version, description, statements in MIGRATIONS:
+                if version <= current:
+                    continue
+                for statement in statements:
+                    if callable(statement):
+                        statement(conn)
+                    else:
+                        conn.execute(text(statement.format(id_column=self.id_column)))
+                conn.execute(
+                    text("INSERT INTO schema_version (version, description) VALUES (:version, :description)"),
+                    {"version": version, "description": description},
+                )
+                applied.append(version)
+            conn.commit()
+        return applied
+
+    def ensure_schema(self):
+        """Migrate at most once per process; afterwards a flag check with no database round-trip.
+
+        An up-to-date database costs one SELECT and no DDL.
+        """
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    if self.schema_version() < LATEST_SCHEMA_VERSION:
+                        applied = self.migrate()
+                        if applied:
+                            print(f"✅ Applied schema migrations {applied} ({self.name})")
+                    self._schema_ready = True
+
+    def ping(self):
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    # --- WRITES ---
+    def insert_records(self, table_name, records):
+        """Insert rows (dicts keyed by column name) into a table in one transaction.
+
+        Uses a multi-row INSERT where the driver supports it, executemany otherwise.
+        """
+        self.ensure_schema()
+        columns = list(dict.fromkeys(key.lower() for record in records for key in record))
+        rows = [{key.lower(): value for key, value in record.items()} for record in records]
+        rows = [{col: row.get(col) for col in columns} for row in rows]
+        with self.engine.begin() as conn:
+            if table_name == "bookings":
+                # The new ids, in row order, to file each booking's tags under
+                target = Table(table_name, MetaData(), Column("id", Integer, primary_key=True),
+                               *(Column(col) for col in columns if col != "id"))
+                result = conn.execute(insert(target).returning(target.c.id, sort_by_parameter_order=True), rows)
+                _insert_tags(conn, result.scalars().all(), rows)
+            else:
+                conn.execute(insert(table(table_name, *(column(col) for col in columns))), rows)
+            # Same transaction: the rollups never count a row that wasn't written
+            self._update_rollups(conn, table_name, rows)
+
+    def save_booking(self, record):
+        self.insert_records("bookings", [record])
+
+    def save_prediction(self, record):
+        self.insert_records("predictions", [record])
+
+    def delete_booking(self, record_id):
+        self.ensure_schema()
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("UPDATE daily_bookings SET bookings = bookings - 1 "
+                     "WHERE day = (SELECT DATE(submitted_on) FROM bookings WHERE id = :id)"),
+                {"id": record_id},
+            )
+            conn.execute(text("DELETE FROM booking_tags WHERE booking_id = :id"), {"id": record_id})
+            conn.execute(text("DELETE FROM bookings WHERE id = :id"), {"id": record_id})
+
+    # --- BULK LOADING ---
+    def _bulk_load(self, conn, table_name, frame):
+        """Insert a DataFrame through the fastest path the backend has (multi-row INSERT here)."""
+        rows = frame.astype(object).where(frame.notna(), None).to_dict("records")
+        conn.execute(insert(table(table_name, *(column(col) for col in frame.columns))), rows)
+
+    def import_progress(self, source):
+        """(rows loaded, file size) checkpointed for a bulk-import source, or (0, None)."""
+        self.ensure_schema()
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                text("SELECT rows_loaded, file_size FROM import_progress WHERE source = :source"), {"source": source}
+            ).first()
+        return (row[0], row[1]) if row else (0, None)
+
+    def load_chunk(self, table_name, frame, source, rows_loaded, file_size=None):
+        """Bulk-insert one chunk of a source file and checkpoint ``rows_loaded`` in the same transaction.
+
+        A chunk is either fully loaded and counted or not at all, so an
+        interrupted import resumes from the checkpoint without duplicates.
+        """
+        self.ensure_schema()
+        with self.engine.begin() as conn:
+            self._bulk_load(conn, self._table(table_name), frame)
+            self._update_rollups(conn, table_name, frame)
+            conn.execute(
+                text("INSERT INTO import_progress (source, file_size, rows_loaded) VALUES (:source, :file_size, :rows) "
+                     "ON CONFLICT (source) DO UPDATE SET file_size = excluded.file_size, "
+                     "rows_loaded = excluded.rows_loaded, updated_on = CURRENT_TIMESTAMP"),
+                {"source": source, "file_size": file_size, "rows": rows_loaded},
+            )
+
+    def reset_import(self, source):
+        """Forget a source's checkpoint (the rows already loaded stay)."""
+        self.ensure_schema()
+        with self.engine.begin() as conn:
+            conn.execute(text("DELETE FROM import_progress WHERE source = :source"), {"source": source})
+
+    # --- ROLLUPS ---
+    @staticmethod
+    def _days(frame, column_name):
+        """Calendar day (YYYY-MM-DD) of a timestamp column; rows without one get today, like the column default."""
+        values = frame[column_name] if column_name in frame else pd.Series(None, index=frame.index, dtype=object)
+        days = pd.to_datetime(values, errors="coerce").dt.strftime("%Y-%m-%d")
+        return days.fillna(pd.Timestamp.now().strftime("%Y-%m-%d"))
+
+    def _update_rollups(self, conn, table_name, rows):
+        """Add freshly inserted rows to the daily rollups (one upsert per day and disease)."""
+        frame = pd.DataFrame(rows)
+        if table_name == "bookings":
+            counts = self._days(frame, "submitted_on").value_counts()
+            conn.execute(
+                text("INSERT INTO daily_bookings (day, bookings) VALUES (:day, :bookings) "
+                     "ON CONFLICT (day) DO UPDATE SET bookings = daily_bookings.bookings + excluded.bookings"),
+                [{"day": day, "bookings": int(n)} for day, n in counts.items()],
+            )
+        elif table_name == "predictions":
+            totals = pd.DataFrame({
+                "day": self._days(frame, "predicted_on").values,
+                "predicted_disease": (frame["predicted_disease"].fillna(UNKNOWN_DISEASE).astype(str).values
+                                      if "predicted_disease" in frame else UNKNOWN_DISEASE),
+                "predictions": 1,
+                **{col: pd.to_numeric(frame[col], errors="coerce").fillna(0).values if col in frame else 0.0
+                   for col in SYMPTOM_COLUMNS},
+            }).groupby(["day", "predicted_disease"], as_index=False).sum()
+
+            value_columns = ["predictions", *SYMPTOM_COLUMNS]
+            conn.execute(
+                text(
+                    f"INSERT INTO daily_predictions (day, predicted_disease, {', '.join(value_columns)}) "
+                    f"VALUES (:day, :predicted_disease, {', '.join(':' + col for col in value_columns)}) "
+                    "ON CONFLICT (day, predicted_disease) DO UPDATE SET "
+                    + ", ".join(f"{col} = daily_predictions.{col} + excluded.{col}" for col in value_columns)
+                ),
+                [{**row, "predictions": int(row["predictions"])} for row in totals.to_dict("records")],
+            )
+
+    def _lock_for_rollup_rebuild(self, conn):
+        """Start the rebuild transaction so no rows are inserted or deleted while it runs."""
+        raise NotImplementedError
+
+    def rebuild_rollups(self):
+        """Recompute the daily rollups and booking tags from the raw tables, in one transaction."""
+        self.ensure_schema()
+        with self.engine.connect() as conn:
+            self._lock_for_rollup_rebuild(conn)
+            for statement in ROLLUP_REBUILD:
+                conn.execute(text(statement))
+            _backfill_booking_tags(conn)
+            conn.commit()
+
+    # --- READS ---
+    def read_frame(self, query, params=None):
+        """Run a SELECT into a DataFrame with lower-case column names."""
+        self.ensure_schema()
+        with self.engine.connect() as conn:
+            df = pd.read_sql_query(text(query), conn, params=params)
+        df.columns = [col.lower() for col in df.columns]
+        return df
+
+    @staticmethod
+    def _table(table_name):
+        if table_name not in TABLES:
+            raise ValueError(f"Unknown table: {table_name!r}")
+        return table_name
+
+    def fetch_page(self, table_name, limit=100, before_id=None):
+        """One page of rows, newest first, with ids below ``before_id`` (keyset pagination).
+
+        Pass the smallest id of a page as ``before_id`` to get the next one;
+        each page is an index range scan on the primary key, however deep.
+        """
+        where = "WHERE id < :before_id " if before_id is not None else ""
+        return self.read_frame(
+            f"SELECT * FROM {self._table(table_name)} {where}ORDER BY id DESC LIMIT :limit",
+            {"before_id": before_id, "limit": limit},
+        )
+
+    def table_columns(self, table_name):
+        """{column name: SQLAlchemy type} of a table, in table order."""
+        self.ensure_schema()
+        return {col["name"].lower(): col["type"] for col in inspect(self.engine).get_columns(self._table(table_name))}
+
+    def iter_frames(self, table_name, columns=None, start=None, end=None, chunksize=10_000):
+        """Stream a table in id order as DataFrames of at most ``chunksize`` rows.
+
+        Reads through a server-side cursor (Postgres) or the natively
+        incremental SQLite cursor, so only one chunk is in memory at a time.
+        ``columns`` picks the columns; ``start``/``end`` are an inclusive date range.
+        """
+        known = self.table_columns(table_name)
+        columns = [col.lower() for col in columns] if columns else list(known)
+        unknown = [col for col in columns if col not in known]
+        if unknown:
+            raise ValueError(f"Unknown {table_name} columns: {', '.join(unknown)}")
+
+        params = {}
+        where = self._where(self._date_filter(TIMESTAMP_COLUMNS[table_name], start, end, params))
+        query = text(f"SELECT {', '.join(columns)} FROM {table_name} {where}ORDER BY id")
+        with self.engine.connect().execution_options(stream_results=True, max_row_buffer=chunksize) as conn:
+            for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunksize):
+                chunk.columns = [col.lower() for col in chunk.columns]
+                yield chunk
+
+    # --- AGGREGATES ---
+    @staticmethod
+    def _date_filter(column_name, start, end, params):
+        """Conditions for an inclusive date range on a timestamp column."""
+        conditions = []
+        if start is not None:
+            params["start"] = str(start)
+            conditions.append(f"{column_name} >= :start")
+        if end is not None:
+            params["end"] = str(end + timedelta(days=1))
+            conditions.append(f"{column_name} < :end")
+        return conditions
+
+    @staticmethod
+    def _disease_filter(diseases, params):
+        if not diseases:
+            return []
+        names = []
+        for i, disease in enumerate(diseases):
+            params[f"disease_{i}"] = disease
+            names.append(f":disease_{i}")
+        return [f"predicted_disease IN ({', '.join(names)})"]
+
+    @classmethod
+    def _booking_filter(cls, start, end, tags, params, prefix=""):
+        """Conditions for a submitted_on date range (inclusive) and required tags, as {field: tag}.
+
+        ``prefix`` qualifies the bookings columns (e.g. "b.") in a join.
+        """
+        conditions = cls._date_filter(f"{prefix}submitted_on", start, end, params)
+        for i, (field, tag) in enumerate((tags or {}).items()):
+            if field not in TAG_FIELDS:
+                raise ValueError(f"Can't filter bookings on {field!r} tags")
+            params[f"tag_field_{i}"], params[f"tag_{i}"] = field, normalise_tag(tag)
+            conditions.append(
+                f"{prefix}id IN (SELECT booking_id FROM booking_tags WHERE field = :tag_field_{i} AND tag = :tag_{i})"
+            )
+        return conditions
+
+    @staticmethod
+    def _where(conditions):
+        return f"WHERE {' AND '.join(conditions)} " if conditions else ""
+
+    def count_predictions_by_disease(self, diseases=None):
+        """Predictions per disease, most frequent first: columns predicted_disease, count (from the rollup)."""
+        params = {}
+        where = self._where(self._disease_filter(diseases, params))
+        return self.read_frame(
+            f"SELECT predicted_disease, SUM(predictions) AS count FROM daily_predictions {where}"
+            "GROUP BY predicted_disease ORDER BY count DESC",
+            params,
+        )
+
+    def sum_symptoms(self, diseases=None):
+        """Total of each symptom over the (filtered) predictions: columns symptom, count (from the rollup)."""
+        params = {}
+        where = self._where(self._disease_filter(diseases, params))
+        sums = ", ".join(f"COALESCE(SUM({col}), 0) AS {col}" for col in SYMPTOM_COLUMNS)
+        totals = self.read_frame(f"SELECT {sums} FROM daily_predictions {where}", params).iloc[0]
+        return pd.DataFrame({"symptom": SYMPTOM_COLUMNS, "count": [totals[col] for col in SYMPTOM_COLUMNS]})
+
+    def summarise_predictions(self, diseases=None):
+        """count/mean/std/min/max of the numeric prediction columns, laid out like DataFrame.describe()."""
+        params = {}
+        where = self._where(self._disease_filter(diseases, params))
+        parts = []
+        for col in PREDICTION_NUMERIC_COLUMNS:
+            value = f"CAST({col} AS FLOAT)"
+            parts += [f"COUNT({col}) AS {col}__count", f"AVG({value}) AS {col}__mean",
+                      f"AVG({value} * {value}) AS {col}__square", f"MIN({col}) AS {col}__min",
+                      f"MAX({col}) AS {col}__max"]
+        row = self.read_frame(f"SELECT {', '.join(parts)} FROM predictions {where}", params).iloc[0]
+
+        summary = {}
+        for col in PREDICTION_NUMERIC_COLUMNS:
+            n, mean = float(row[f"{col}__count"]), row[f"{col}__mean"]
+            std = np.nan
+            if n > 1:
+                # Sample standard deviation from the running sums, as describe() reports it
+                std = np.sqrt(max(row[f"{col}__square"] - mean * mean, 0.0) * n / (n - 1))
+            summary[col] = [n, mean, std, row[f"{col}__min"], row[f"{col}__max"]]
+        return pd.DataFrame(summary, index=["count", "mean", "std", "min", "max"], dtype=float)
+
+    def booking_date_range(self):
+        """(first, last) days with bookings, or (None, None) without bookings."""
+        row = self.read_frame(
+            "SELECT MIN(day) AS first, MAX(day) AS last FROM daily_bookings WHERE bookings > 0"
+        ).iloc[0]
+        first, last = pd.to_datetime(row["first"]), pd.to_datetime(row["last"])
+        return (None, None) if pd.isna(first) else (first, last)
+
+    def daily_bookings(self, start=None, end=None, tags=None):
+        """Bookings per day between two dates (inclusive): columns day, count.
+
+        Read from the rollup; with tag filters the matching bookings are
+        grouped from the bookings table instead.
+        """
+        params = {}
+        if tags:
+            where = self._where(self._booking_filter(start, end, tags, params))
+            return self.read_frame(
+                f"SELECT DATE(submitted_on) AS day, COUNT(*) AS count FROM bookings {where}"
+                "GROUP BY DATE(submitted_on) ORDER BY day",
+                params,
+            )
+
+        conditions = ["bookings > 0"]
+        if start is not None:
+            params["start"] = str(start)
+            conditions.append("day >= :start")
+        if end is not None:
+            params["end"] = str(end)
+            conditions.append("day <= :end")
+        return self.read_frame(
+            f"SELECT day, bookings AS count FROM daily_bookings {self._where(conditions)}ORDER BY day", params
+        )
+
+    def count_bookings_by(self, column_name, start=None, end=None, tags=None):
+        """Bookings per value of a column, most frequent first: columns <column_name>, count."""
+        if column_name not in BOOKING_FILTER_COLUMNS:
+            raise ValueError(f"Can't group bookings by {column_name!r}")
+        params = {}
+        where = self._where(self._booking_filter(start, end, tags, params))
+        return self.read_frame(
+            f"SELECT {column_name}, COUNT(*) AS count FROM bookings {where}"
+            f"GROUP BY {column_name} ORDER BY count DESC",
+            params,
+        )
+
+    def tag_values(self, field):
+        """Every distinct tag of a field, alphabetically."""
+        if field not in TAG_FIELDS:
+            raise ValueError(f"Unknown tag field: {field!r}")
+        return self.read_frame(
+            "SELECT DISTINCT tag FROM booking_tags WHERE field = :field ORDER BY tag", {"field": field}
+        )["tag"].tolist()
+
+    def top_tags(self, field, limit=None, start=None, end=None, tags=None):
+        """Most frequent tags of a field among the filtered bookings: columns tag, count."""
+        if field not in TAG_FIELDS:
+            raise ValueError(f"Unknown tag field: {field!r}")
+        params = {"field": field, "limit": limit}
+        conditions = ["t.field = :field", *self._booking_filter(start, end, tags, params, prefix="b.")]
+        return self.read_frame(
+            f"SELECT t.tag, COUNT(*) AS count FROM booking_tags t JOIN bookings b ON b.id = t.booking_id "
+            f"{self._where(conditions)}GROUP BY t.tag ORDER BY count DESC, t.tag"
+            + (" LIMIT :limit" if limit is not None else ""),
+            params,
+        )
+
+    def summarise_bookings(self, start=None, end=None, tags=None):
+        """count/unique/mean/std/min/max of every booking column over the filtered bookings.
+
+        One aggregate query, laid out like DataFrame.describe(include="all");
+        mean and std only for numeric columns.
+        """
+        params = {}
+        where = self._where(self._booking_filter(start, end, tags, params))
+        columns = {name: col_type for name, col_type in self.table_columns("bookings").items() if name != "id"}
+        numeric = [name for name, col_type in columns.items() if isinstance(col_type, (Integer, Float, Numeric))]
+        parts = []
+        for col in columns:
+            parts += [f"COUNT({col}) AS {col}__count", f"COUNT(DISTINCT {col}) AS {col}__unique",
+                      f"MIN({col}) AS {col}__min", f"MAX({col}) AS {col}__max"]
+            if col in numeric:
+                value = f"CAST({col} AS FLOAT)"
+                parts += [f"AVG({value}) AS {col}__mean", f"AVG({value} * {value}) AS {col}__square"]
+        row = self.read_frame(f"SELECT {', '.join(parts)} FROM bookings {where}", params).iloc[0]
+
+        summary = {}
+        for col in columns:
+            n = float(row[f"{col}__count"])
+            mean = std = np.nan
+            if col in numeric:
+                mean = row[f"{col}__mean"]
+                if n > 1:
+                    std = np.sqrt(max(row[f"{col}__square"] - mean * mean, 0.0) * n / (n - 1))
+            summary[col] = [n, row[f"{col}__unique"], mean, std, row[f"{col}__min"], row[f"{col}__max"]]
+        return pd.DataFrame(summary, index=["count", "unique", "mean", "std", "min", "max"], dtype=object)
+
+    def get_all_bookings(self):
+        return self.read_frame("SELECT * FROM bookings ORDER BY id DESC")
+
+    def get_all_predictions(self):
+        return self.read_frame("SELECT * FROM predictions ORDER BY id DESC")
+
+
+class PostgresBackend(SQLBackend):
+    """Supabase / PostgreSQL over SSL."""
+
+    name = "postgres"
+    id_column = "SERIAL PRIMARY KEY"
+
+    def __init__(self, url, sslmode="require"):
+        super().__init__(create_engine(url, connect_args={"sslmode": sslmode}, pool_pre_ping=True))
+
+    def _lock_for_migration(self, conn):
+        conn.execute(text("LOCK TABLE schema_version IN EXCLUSIVE MODE"))
+
+    def _lock_for_rollup_rebuild(self, conn):
+        # Blocks writes to the raw tables (reads carry on) until the rebuild commits
+        conn.execute(text("LOCK TABLE bookings, predictions IN SHARE MODE"))
+
+    def _bulk_load(self, conn, table_name, frame):
+        # COPY streams the chunk as CSV in one round trip: far faster than INSERT for large loads
+        buffer = io.StringIO()
+        frame.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        with conn.connection.dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table_name} ({', '.join(frame.columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+class SQLiteBackend(SQLBackend):
+    """A local SQLite file: no network, the lowest latency for a single clinic."""
+
+    name = "sqlite"
+    id_column = "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH):
+        self.path = path
+        engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 30})
+
+        @event.listens_for(engine, "connect")
+        def _configure(dbapi_conn, _):
+            # WAL lets the admin page read while the app writes
+            dbapi_conn.execute("PRAGMA journal_mode=WAL")
+            dbapi_conn.execute("PRAGMA synchronous=NORMAL")
+
+        super().__init__(engine)
+
+    def _lock_for_migration(self, conn):
+        # Take the write lock up front rather than on the first write
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    def _lock_for_rollup_rebuild(self, conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    def _bulk_load(self, conn, table_name, frame):
+        # executemany of one prepared statement; the caller's transaction makes it a single commit
+        rows = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+        conn.exec_driver_sql(
+            f"INSERT INTO {table_name} ({', '.join(frame.columns)}) VALUES ({', '.join('?' * len(frame.columns))})",
+            list(rows),
+        )
+
+
+def create_backend(name=None, database_url=None, sqlite_path=None):
+    """The configured backend: Postgres (SUPABASE_URL) unless STORE_BACKEND=sqlite.
+
+    A missing SUPABASE_URL is an error rather than a quiet switch to a local
+    file, so a misconfigured deployment can't keep patient data on one server.
+    """
+    name = name or os.getenv("STORE_BACKEND") or "postgres"
+    database_url = database_url or os.getenv("SUPABASE_URL")
+    if name == "postgres":
+        if not database_url:
+            raise ValueError("❌ SUPABASE_URL not found in .env file! "
+                             "Set STORE_BACKEND=sqlite to use the local SQLite store instead.")
+        return PostgresBackend(database_url, sslmode=os.getenv("STORE_SSLMODE", "require"))
+    if name == "sqlite":
+        return SQLiteBackend(sqlite_path or os.getenv("STORE_SQLITE_PATH", DEFAULT_SQLITE_PATH))
+    raise ValueError(f"Unknown STORE_BACKEND: {name!r} (expected 'postgres' or 'sqlite')")
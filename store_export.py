@@ -0,0 +1,92 @@
+import os
+import time
+import argparse
+from datetime import date
+import pandas as pd
+from sqlalchemy import types
+from batch_predict import ChunkWriter
+from store_pipeline import backend, flush_writes
+
+# --- EXPORT SETTINGS ---
+EXPORT_CHUNKSIZE = int(os.getenv("STORE_EXPORT_CHUNKSIZE", 10_000))
+EXPORT_FORMATS = ("parquet", "csv")
+
+
+def arrow_schema(table_name, columns=None):
+    """Parquet schema for a table, from the database column types.
+
+    Fixed up front so every chunk is written with the same types, even when
+    a column happens to be empty in the first one.
+    """
+    import pyarrow as pa
+    known = backend.table_columns(table_name)
+    fields = []
+    for name in [col.lower() for col in columns] if columns else known:
+        if name not in known:
+            raise ValueError(f"Unknown {table_name} column: {name}")
+        col_type = known[name]
+        if isinstance(col_type, types.Integer):
+            fields.append(pa.field(name, pa.int64()))
+        elif isinstance(col_type, (types.Float, types.Numeric)):
+            fields.append(pa.field(name, pa.float64()))
+        elif isinstance(col_type, (types.DateTime, types.Date)):
+            fields.append(pa.field(name, pa.timestamp("us")))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+def _coerce(chunk, schema):
+    """Convert a chunk's columns to the schema's types (SQLite returns whatever was stored)."""
+    import pyarrow as pa
+    for field in schema:
+        values = chunk[field.name]
+        if pa.types.is_integer(field.type):
+            chunk[field.name] = pd.to_numeric(values, errors="coerce").astype("Int64")
+        elif pa.types.is_floating(field.type):
+            chunk[field.name] = pd.to_numeric(values, errors="coerce").astype("float64")
+        elif pa.types.is_timestamp(field.type):
+            chunk[field.name] = pd.to_datetime(values, errors="coerce")
+        else:
+            chunk[field.name] = values.where(values.isna(), values.astype(str))
+    return chunk
+
+
+def export_table(table_name, path, columns=None, start=None, end=None, chunksize=EXPORT_CHUNKSIZE):
+    """Write bookings or predictions to a .parquet or .csv file, one chunk at a time.
+
+    ``columns`` limits the export to those columns; ``start``/``end`` to
+    rows recorded in that (inclusive) date range. Returns the rows written.
+    """
+    # Rows still in the write-behind spool belong in the export too
+    flush_writes()
+    schema = arrow_schema(table_name, columns) if path.endswith(".parquet") else None
+    writer = ChunkWriter(path, schema=schema)
+    rows = 0
+    try:
+        for chunk in backend.iter_frames(table_name, columns, start, end, chunksize):
+            writer.write(_coerce(chunk, schema) if schema is not None else chunk)
+            rows += len(chunk)
+    finally:
+        writer.close()
+    if not rows and schema is None:
+        # No rows: still write the header
+        header = [col.lower() for col in columns] if columns else list(backend.table_columns(table_name))
+        pd.DataFrame(columns=header).to_csv(path, index=False)
+    return rows
+
+
+# --- RUN ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export bookings or predictions to Parquet or CSV without loading the whole table.")
+    parser.add_argument("table", choices=["bookings", "predictions"])
+    parser.add_argument("output", help="output .parquet or .csv file")
+    parser.add_argument("--columns", nargs="*", default=None, help="columns to export (default: all)")
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="first day to include (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="last day to include (YYYY-MM-DD)")
+    parser.add_argument("--chunksize", type=int, default=EXPORT_CHUNKSIZE, help="rows per chunk")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = export_table(args.table, args.output, args.columns, args.start, args.end, args.chunksize)
+    print(f"✅ Exported {rows:,} {args.table} rows in {time.perf_counter() - start:.1f}s -> {args.output}")
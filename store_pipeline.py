@@ -1,89 +1,78 @@
 import os
+import sqlite3
+import argparse
+import logging
 from datetime import datetime
-import pandas as pd
-from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
+from store_backends import create_backend
+from write_behind import WriteBehindQueue
 
 # --- Load environment variables ---
 load_dotenv()
 
-# --- Initialize Supabase Engine ---
-DATABASE_URL = os.getenv("SUPABASE_URL")
+# --- Initialize Storage Backend ---
+# Postgres (Supabase) from SUPABASE_URL, or the local SQLite store with STORE_BACKEND=sqlite (see store_backends)
+backend = create_backend()
 
-if not DATABASE_URL:
-    raise ValueError("❌ SUPABASE_URL not found in .env file!")
+# Spool saves locally and insert them in the background, so forms never wait on a remote database.
+# A local SQLite store is already fast, so it writes directly by default.
+WRITE_BEHIND = os.getenv("STORE_WRITE_BEHIND", "1" if backend.name == "postgres" else "0") == "1"
 
-# Use SSL for Supabase PostgreSQL
-engine = create_engine(DATABASE_URL, connect_args={"sslmode": "require"})
+
+# --- SCHEMA ---
+def schema_version():
+    return backend.schema_version()
+
+
+def migrate():
+    return backend.migrate()
+
+
+def ensure_schema():
+    backend.ensure_schema()
 
 
-# --- CREATE TABLES IN SUPABASE ---
 def init_supabase_db():
-    """Creates tables in Supabase PostgreSQL if they don't exist."""
-    create_queries = """
-    CREATE TABLE IF NOT EXISTS bookings (
-        id SERIAL PRIMARY KEY,
-        name TEXT,
-        email TEXT,
-        gender TEXT,
-        phone_number VARCHAR(25),
-        preferred_date DATE,
-        preferred_time TEXT,
-        problem TEXT,
-        start_date TEXT,
-        current_condition_after_start TEXT,
-        severity INTEGER,
-        occured_before TEXT,
-        medication_taken TEXT,
-        fever TEXT,
-        pain TEXT,
-        cough_cold_breath_shortness TEXT,
-        change_in_appetite_weight TEXT,
-        chronic_conditions TEXT,
-        current_medication TEXT,
-        allergies TEXT,
-        past_hospitalization_surgery TEXT,
-        smoke_or_alcohol TEXT,
-        sleep_hours INTEGER,
-        exercise_frequency TEXT,
-        stress_fatigue TEXT,
-        women_status TEXT,
-        other_notes TEXT,
-        submitted_on TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-
-    CREATE TABLE IF NOT EXISTS predictions (
-        id SERIAL PRIMARY KEY,
-        name TEXT,
-        age INTEGER,
-        gender TEXT,
-        fever REAL,
-        cough INTEGER,
-        headache INTEGER,
-        fatigue INTEGER,
-        nausea INTEGER,
-        muscle_pain INTEGER,
-        shortness_of_breath INTEGER,
-        loss_of_taste INTEGER,
-        abdominal_pain INTEGER,
-        appetite_loss INTEGER,
-        frequent_urination INTEGER,
-        thirst_level INTEGER,
-        blurred_vision INTEGER,
-        symptom_duration_days INTEGER,
-        severity INTEGER,
-        predicted_disease TEXT,
-        predicted_on TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-    """
-    with engine.begin() as conn:
-        conn.execute(text(create_queries))
-    print("✅ Supabase tables initialized!")
+    """Creates tables in the configured database if they don't exist."""
+    ensure_schema()
+    print(f"✅ {backend.name} tables initialized!")
+
+
+# --- WRITE PATH ---
+def insert_records(table_name, records):
+    """Insert rows (dicts keyed by column name) into a table in one transaction."""
+    backend.insert_records(table_name, records)
+
+
+_writer = WriteBehindQueue(insert_records, ping=lambda: backend.ping())
+if WRITE_BEHIND:
+    _writer.resume()
+
+
+def _save(table_name, record):
+    """Spool the row for the background writer, or insert it now if write-behind is off or unavailable."""
+    if WRITE_BEHIND:
+        try:
+            _writer.enqueue(table_name, record)
+            return
+        except sqlite3.Error as e:
+            logging.warning(f"Write-behind spool unavailable, writing directly: {e}")
+    insert_records(table_name, [record])
+
+
+def flush_writes(timeout=None):
+    """Insert everything still spooled now (e.g. before a report that must include it)."""
+    return _writer.flush(timeout)
+
+
+def pending_writes():
+    """Rows spooled but not yet in the database: {"pending": n, "failed": n}."""
+    return _writer.stats()
 
 
 # --- SAVE FORM DATA ---
 def save_booking_to_db(data):
-    """Save booking info to Supabase PostgreSQL."""
+    """Save booking info to the configured database."""
     
     # Flatten any single-item lists (e.g., from Streamlit widgets)
     for key, value in data.items():
@@ -100,62 +89,116 @@ def save_booking_to_db(data):
     # Add clean lowercase version
     data["submitted_on"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    # Build SQL query
-    columns = ", ".join(data.keys())
-    placeholders = ", ".join([f":{col}" for col in data.keys()])
-    query = text(f"INSERT INTO bookings ({columns}) VALUES ({placeholders})")
-
-    with engine.begin() as conn:
-        conn.execute(query, data)
+    _save("bookings", data)
 
     print("✅ Booking saved successfully!")
 
 
 # --- SAVE PREDICTIONS ---
 def save_predictions_to_db(pred_data):
-    """Save prediction results to Supabase PostgreSQL database."""
+    """Save prediction results to the configured database."""
     
     # Add prediction timestamp if missing
     if "predicted_on" not in pred_data:
         pred_data["predicted_on"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    columns = ", ".join(pred_data.keys())
-    placeholders = ", ".join([f":{col}" for col in pred_data.keys()])
-    query = text(f"INSERT INTO predictions ({columns}) VALUES ({placeholders})")
-
-    with engine.begin() as conn:
-        conn.execute(query, pred_data)
+    _save("predictions", pred_data)
 
     print("✅ Prediction saved successfully!")
 
 
 # --- FETCH ALL BOOKINGS ---
 def get_all_bookings():
-    """Retrieve all bookings from Supabase."""
-    query = "SELECT * FROM bookings ORDER BY id DESC"
-    with engine.connect() as conn:
-        df = pd.read_sql_query(query, conn)
-    return df
+    """Retrieve all bookings, newest first."""
+    return backend.get_all_bookings()
 
 
 # --- FETCH ALL PREDICTIONS ---
 def get_all_predictions():
-    """Fetch all predictions from Supabase PostgreSQL."""
-    query = "SELECT * FROM predictions ORDER BY id DESC"
-    with engine.connect() as conn:
-        df = pd.read_sql_query(query, conn)
-    return df
+    """Fetch all predictions, newest first."""
+    return backend.get_all_predictions()
+
+
+# --- PAGINATED READS ---
+def get_page(table_name, limit=100, before_id=None):
+    """A page of bookings or predictions, newest first; pass the page's smallest id to get the next."""
+    return backend.fetch_page(table_name, limit, before_id)
+
+
+def table_columns(table_name):
+    """Column names of bookings or predictions."""
+    return list(backend.table_columns(table_name))
+
+
+# --- DASHBOARD AGGREGATES (computed by the database, mostly from the daily rollups) ---
+def rebuild_rollups():
+    """Recompute the daily rollup tables and booking tags from bookings and predictions."""
+    flush_writes()
+    backend.rebuild_rollups()
+    print(f"✅ {backend.name} daily rollups and booking tags rebuilt!")
+
+
+def count_predictions_by_disease(diseases=None):
+    """Predictions per disease, optionally only the given diseases."""
+    return backend.count_predictions_by_disease(diseases)
+
+
+def sum_symptoms(diseases=None):
+    """Total of each symptom across the (filtered) predictions."""
+    return backend.sum_symptoms(diseases)
+
+
+def summarise_predictions(diseases=None):
+    """describe()-style summary of the numeric prediction columns."""
+    return backend.summarise_predictions(diseases)
+
+
+def booking_date_range():
+    """(first, last) booking timestamps, or (None, None)."""
+    return backend.booking_date_range()
+
+
+def daily_bookings(start=None, end=None, tags=None):
+    """Bookings per day between two dates; ``tags`` maps a field (e.g. "allergies") to a tag it must have."""
+    return backend.daily_bookings(start, end, tags)
+
+
+def count_bookings_by(column_name, start=None, end=None, tags=None):
+    """Bookings per value of a column, with the same filters as daily_bookings."""
+    return backend.count_bookings_by(column_name, start, end, tags)
+
+
+# --- BOOKING TAGS (problem, allergies, smoke_or_alcohol, one value per row) ---
+def tag_values(field):
+    """Distinct tags of a field, for filter options."""
+    return backend.tag_values(field)
+
+
+def top_tags(field, limit=None, start=None, end=None, tags=None):
+    """Most frequent tags of a field among bookings matching the filters."""
+    return backend.top_tags(field, limit, start, end, tags)
+
+
+def summarise_bookings(start=None, end=None, tags=None):
+    """describe()-style summary of the bookings matching the filters, computed by the database."""
+    return backend.summarise_bookings(start, end, tags)
 
 
 # --- DELETE A BOOKING ---
 def delete_booking(record_id):
     """Deletes a booking record by ID."""
-    query = text("DELETE FROM bookings WHERE id = :id")
-    with engine.begin() as conn:
-        conn.execute(query, {"id": record_id})
+    backend.delete_booking(record_id)
     print(f"🗑️ Booking with ID {record_id} deleted.")
 
 
-# --- Run this manually once to ensure tables exist ---
+# --- Run this manually to migrate ahead of a deploy (the app also migrates on first use) ---
 if __name__ == "__main__":
-    init_supabase_db()
+    parser = argparse.ArgumentParser(description="Migrate the store's schema.")
+    parser.add_argument("--rebuild-rollups", action="store_true",
+                        help="also recompute the daily rollups and booking tags from the raw tables (backfill or repair)")
+    args = parser.parse_args()
+
+    applied = migrate()
+    print(f"✅ {backend.name} schema up to date (applied: {applied or 'nothing'})")
+    if args.rebuild_rollups:
+        rebuild_rollups()
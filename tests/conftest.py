@@ -0,0 +1,57 @@
+import os
+import sys
+import shutil
+import tempfile
+
+import pytest
+from sqlalchemy import text
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# store_pipeline opens its backend at import: point it (and the translation cache) at scratch files,
+# never phc_store.db or Supabase
+_scratch = tempfile.mkdtemp(prefix="medguide-tests-")
+os.environ.pop("SUPABASE_URL", None)
+os.environ.pop("TRANSLATION_CATALOG_DIR", None)
+os.environ["STORE_BACKEND"] = "sqlite"
+os.environ["STORE_SQLITE_PATH"] = os.path.join(_scratch, "store.db")
+os.environ["STORE_SPOOL_PATH"] = os.path.join(_scratch, "spool.db")
+os.environ["STORE_WRITE_BEHIND"] = "0"
+os.environ["TRANSLATION_CACHE_DB"] = os.path.join(_scratch, "translation_cache.db")
+
+from store_backends import SQLiteBackend  # noqa: E402
+
+
+def scalar(store, query):
+    """First column of the first row of a query, 0 for NULL."""
+    with store.engine.connect() as conn:
+        return conn.execute(text(query)).scalar() or 0
+
+
+@pytest.fixture
+def backend(tmp_path):
+    """A migrated SQLite store in a fresh file."""
+    store = SQLiteBackend(str(tmp_path / "store.db"))
+    store.ensure_schema()
+    return store
+
+
+@pytest.fixture
+def artifacts(tmp_path, monkeypatch):
+    """Serve copies of the shipped pickles from a scratch directory (legacy layout), with a fresh cache."""
+    import prediction_pipeline
+
+    paths = {
+        "version": None,
+        "preprocessor": str(tmp_path / "preprocessor.pkl"),
+        "model": str(tmp_path / "disease_predictor.pkl"),
+        "compiled": str(tmp_path / "compiled"),
+        "compiled_preprocessor": str(tmp_path / "preprocessor.json"),
+    }
+    shutil.copy(os.path.join(REPO_DIR, "preprocessor.pkl"), paths["preprocessor"])
+    shutil.copy(os.path.join(REPO_DIR, "disease_predictor.pkl"), paths["model"])
+    monkeypatch.setattr(prediction_pipeline, "artifact_paths", lambda: paths)
+    monkeypatch.setattr(prediction_pipeline, "_artifacts", None)
+    monkeypatch.setattr(prediction_pipeline, "_prediction_cache", prediction_pipeline.PredictionCache())
+    return paths
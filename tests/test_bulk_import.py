@@ -0,0 +1,81 @@
+import os
+
+import pandas as pd
+import pytest
+
+import bulk_import
+from conftest import REPO_DIR
+
+
+@pytest.fixture
+def source(tmp_path):
+    df = pd.read_csv(os.path.join(REPO_DIR, "realistic_patient_symptom_features.csv")).head(250)
+    df["Visit_Date"] = pd.date_range("2023-01-01", periods=len(df), freq="D").strftime("%Y-%m-%d")
+    path = str(tmp_path / "records.csv")
+    df.to_csv(path, index=False)
+    return path, df
+
+
+@pytest.fixture
+def store(backend, monkeypatch):
+    monkeypatch.setattr(bulk_import, "backend", backend)
+    return backend
+
+
+def _imported(store):
+    return store.read_frame("SELECT * FROM predictions ORDER BY id")
+
+
+def test_interrupted_import_resumes_without_duplicates(store, source, monkeypatch):
+    path, df = source
+    bulk_load = type(store)._bulk_load
+    calls = []
+
+    def fail_on_third_chunk(self, conn, table_name, frame):
+        calls.append(len(frame))
+        bulk_load(self, conn, table_name, frame)
+        if len(calls) == 3:
+            # After the rows are written: the chunk's transaction must roll them back
+            raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(type(store), "_bulk_load", fail_on_third_chunk)
+    with pytest.raises(RuntimeError):
+        bulk_import.import_file(path, chunksize=100, date_column="Visit_Date")
+    assert len(_imported(store)) == 200
+    assert store.import_progress(os.path.abspath(path))[0] == 200
+
+    monkeypatch.setattr(type(store), "_bulk_load", bulk_load)
+    loaded, _ = bulk_import.import_file(path, chunksize=100, date_column="Visit_Date")
+    assert loaded == 50
+
+    imported = _imported(store)
+    assert len(imported) == len(df)
+    assert list(imported["predicted_disease"]) == list(df["Disease"])
+    assert list(pd.to_datetime(imported["predicted_on"]).dt.strftime("%Y-%m-%d")) == list(df["Visit_Date"])
+    # The rollups count every row once
+    assert int(store.read_frame("SELECT SUM(predictions) AS n FROM daily_predictions")["n"][0]) == len(df)
+
+    # A finished file is not loaded again
+    assert bulk_import.import_file(path, chunksize=100, date_column="Visit_Date")[0] == 0
+    assert len(_imported(store)) == len(df)
+
+
+def test_changed_file_needs_restart(store, source):
+    path, df = source
+    bulk_import.import_file(path, chunksize=100)
+    df.head(10).to_csv(path, mode="a", header=False, index=False)
+    with pytest.raises(ValueError):
+        bulk_import.import_file(path, chunksize=100)
+    assert bulk_import.import_file(path, chunksize=100, restart=True)[0] == len(df) + 10
+
+
+def test_undated_rows_get_predicted_on(store, source):
+    path, df = source
+    bulk_import.import_file(path, chunksize=100, predicted_on=pd.Timestamp("2020-06-01").date())
+    assert set(_imported(store)["predicted_on"].str[:10]) == {"2020-06-01"}
+
+
+def test_missing_date_column(store, source):
+    path, _ = source
+    with pytest.raises(ValueError):
+        bulk_import.import_file(path, chunksize=100, date_column="Admitted_On")
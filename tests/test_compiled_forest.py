@@ -0,0 +1,35 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from conftest import REPO_DIR
+from compiled_forest import CompiledForest
+
+
+@pytest.fixture(scope="module")
+def features():
+    df = pd.read_csv(os.path.join(REPO_DIR, "realistic_patient_symptom_features.csv"))
+    preprocessor = joblib.load(os.path.join(REPO_DIR, "preprocessor.pkl"))
+    return preprocessor.transform(df.drop(columns=["Patient_ID", "Disease"])), df["Disease"]
+
+
+def test_compiled_forest_matches_sklearn(features):
+    X, y = features
+    model = RandomForestClassifier(n_estimators=15, random_state=0).fit(X, y)
+    compiled = CompiledForest.from_model(model)
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X))
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+
+
+def test_compiled_forest_matches_shipped_model(features, tmp_path):
+    X, _ = features
+    model = joblib.load(os.path.join(REPO_DIR, "disease_predictor.pkl"))
+    directory = str(tmp_path / "compiled")
+    CompiledForest.from_model(model).save(directory)
+    compiled = CompiledForest.load(directory)
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X))
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
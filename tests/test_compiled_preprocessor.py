@@ -0,0 +1,39 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import REPO_DIR
+from compiled_preprocessor import CompiledPreprocessor
+
+
+@pytest.fixture(scope="module")
+def features():
+    df = pd.read_csv(os.path.join(REPO_DIR, "realistic_patient_symptom_features.csv"))
+    return df.drop(columns=["Patient_ID", "Disease"])
+
+
+@pytest.fixture(scope="module")
+def preprocessor():
+    return joblib.load(os.path.join(REPO_DIR, "preprocessor.pkl"))
+
+
+def test_compiled_preprocessor_matches_sklearn(features, preprocessor):
+    compiled = CompiledPreprocessor.from_preprocessor(preprocessor)
+    np.testing.assert_array_equal(compiled.transform(features), preprocessor.transform(features))
+    np.testing.assert_array_equal(compiled.transform(features.iloc[:1]), preprocessor.transform(features.iloc[:1]))
+
+
+def test_compiled_preprocessor_round_trip(features, preprocessor, tmp_path):
+    path = str(tmp_path / "preprocessor.json")
+    CompiledPreprocessor.from_preprocessor(preprocessor).save(path)
+    np.testing.assert_array_equal(CompiledPreprocessor.load(path).transform(features), preprocessor.transform(features))
+
+
+def test_compiled_preprocessor_rejects_unknown_category(features, preprocessor):
+    X = features.iloc[:1].copy()
+    X["Gender"] = "Unknown"
+    with pytest.raises(ValueError):
+        CompiledPreprocessor.from_preprocessor(preprocessor).transform(X)
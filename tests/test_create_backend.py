@@ -0,0 +1,31 @@
+import pytest
+
+from store_backends import create_backend, SQLiteBackend
+
+
+@pytest.fixture
+def environment(monkeypatch):
+    for name in ("STORE_BACKEND", "SUPABASE_URL", "STORE_SQLITE_PATH"):
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+
+def test_missing_database_url_is_an_error(environment):
+    with pytest.raises(ValueError, match="SUPABASE_URL"):
+        create_backend()
+    environment.setenv("STORE_BACKEND", "postgres")
+    with pytest.raises(ValueError, match="SUPABASE_URL"):
+        create_backend()
+
+
+def test_sqlite_only_when_asked_for(environment, tmp_path):
+    environment.setenv("STORE_BACKEND", "sqlite")
+    environment.setenv("STORE_SQLITE_PATH", str(tmp_path / "store.db"))
+    backend = create_backend()
+    assert isinstance(backend, SQLiteBackend)
+    assert backend.path == str(tmp_path / "store.db")
+
+
+def test_unknown_backend_is_rejected(environment):
+    with pytest.raises(ValueError, match="mysql"):
+        create_backend("mysql")
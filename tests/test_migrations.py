@@ -0,0 +1,49 @@
+import os
+import shutil
+
+from sqlalchemy import inspect
+
+from conftest import REPO_DIR, scalar
+from store_backends import SQLiteBackend, LATEST_SCHEMA_VERSION, MIGRATIONS
+
+
+def test_migrations_apply_to_fresh_database(tmp_path):
+    store = SQLiteBackend(str(tmp_path / "fresh.db"))
+    assert store.schema_version() == 0
+    assert store.migrate() == [version for version, _, _ in MIGRATIONS]
+    assert store.schema_version() == LATEST_SCHEMA_VERSION
+    assert {"bookings", "predictions", "daily_bookings", "daily_predictions", "import_progress",
+            "booking_tags"} <= set(inspect(store.engine).get_table_names())
+    # Already up to date: nothing to apply
+    assert store.migrate() == []
+
+
+def test_migrations_apply_to_baseline_store(tmp_path):
+    path = str(tmp_path / "phc_store.db")
+    shutil.copy(os.path.join(REPO_DIR, "phc_store.db"), path)
+    store = SQLiteBackend(path)
+    bookings = scalar(store, "SELECT COUNT(*) FROM bookings")
+    predictions = scalar(store, "SELECT COUNT(*) FROM predictions")
+
+    store.migrate()
+    assert store.schema_version() == LATEST_SCHEMA_VERSION
+    # Existing rows are kept and counted by the backfilled rollups
+    assert scalar(store, "SELECT COUNT(*) FROM bookings") == bookings
+    assert scalar(store, "SELECT COUNT(*) FROM predictions") == predictions
+    assert scalar(store, "SELECT SUM(bookings) FROM daily_bookings") == \
+        scalar(store, "SELECT COUNT(*) FROM bookings WHERE submitted_on IS NOT NULL")
+    assert scalar(store, "SELECT SUM(predictions) FROM daily_predictions") == \
+        scalar(store, "SELECT COUNT(*) FROM predictions WHERE predicted_on IS NOT NULL")
+
+
+def test_ensure_schema_checks_once_per_process(tmp_path, monkeypatch):
+    store = SQLiteBackend(str(tmp_path / "store.db"))
+    store.ensure_schema()
+    assert store.schema_version() == LATEST_SCHEMA_VERSION
+
+    def unexpected():
+        raise AssertionError("schema checked again")
+
+    monkeypatch.setattr(store, "schema_version", unexpected)
+    monkeypatch.setattr(store, "migrate", unexpected)
+    store.ensure_schema()
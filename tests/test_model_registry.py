@@ -0,0 +1,77 @@
+import os
+import json
+import logging
+
+import joblib
+import pytest
+
+import model_registry
+from conftest import REPO_DIR
+from model_registry import register_version, list_versions, active_version, set_active, artifact_paths
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "REGISTRY_DIR", str(tmp_path / "models"))
+    monkeypatch.setattr(model_registry, "_missing_warned", set())
+    return tmp_path / "models"
+
+
+@pytest.fixture(scope="module")
+def trained():
+    return joblib.load(os.path.join(REPO_DIR, "preprocessor.pkl")), joblib.load(os.path.join(REPO_DIR, "disease_predictor.pkl"))
+
+
+def _write_active(registry, version):
+    (registry / model_registry.ACTIVE_FILE).write_text(version)
+
+
+def test_versions_registered_in_the_same_second_are_unique(registry, trained):
+    versions = [register_version(*trained, {"data_hash": "deadbeefcafe"}) for _ in range(3)]
+    assert len(set(versions)) == 3
+    assert list_versions() == versions
+    assert active_version() == versions[-1]
+    assert artifact_paths()["model"] == os.path.join(str(registry), versions[-1], model_registry.MODEL_FILE)
+    with open(registry / versions[-1] / model_registry.METADATA_FILE) as f:
+        assert json.load(f)["version"] == versions[-1]
+
+
+def test_no_registry_serves_legacy_pickles(registry):
+    assert active_version() is None
+    assert artifact_paths()["model"] == model_registry.LEGACY_MODEL_PATH
+
+
+def test_unfinished_registration_is_not_a_version(registry, trained):
+    version = register_version(*trained, {})
+    leftover = registry / "20991231-000000.tmp"
+    leftover.mkdir()
+    (leftover / model_registry.METADATA_FILE).write_text("{}")
+
+    assert list_versions() == [version]
+    with pytest.raises(ValueError):
+        set_active(leftover.name)
+    _write_active(registry, "20991231-000000")
+    assert active_version() == version
+
+
+def test_missing_active_version_falls_back_to_newest(registry, trained, caplog):
+    older = register_version(*trained, {}, activate=False)
+    _write_active(registry, "20000101-000000")
+    with caplog.at_level(logging.WARNING):
+        assert active_version() == older
+        assert active_version() == older
+    assert len([r for r in caplog.records if "missing" in r.getMessage()]) == 1
+
+
+def test_missing_active_version_without_versions_serves_legacy(registry):
+    registry.mkdir()
+    _write_active(registry, "20000101-000000")
+    assert active_version() is None
+    assert artifact_paths()["version"] is None
+
+
+def test_failed_registration_leaves_nothing_behind(registry, trained):
+    _, model = trained
+    with pytest.raises(Exception):
+        register_version(object(), model, {})
+    assert os.listdir(registry) == []
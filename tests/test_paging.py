@@ -0,0 +1,30 @@
+import pytest
+
+
+def test_keyset_pages_cover_every_row_once(backend):
+    backend.insert_records("predictions", [{"age": i, "predicted_disease": "Flu"} for i in range(25)])
+    pages, before_id = [], None
+    while True:
+        page = backend.fetch_page("predictions", 10, before_id)
+        if page.empty:
+            break
+        pages.append(page)
+        before_id = int(page["id"].min())
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    ids = [i for page in pages for i in page["id"].tolist()]
+    assert ids == sorted(ids, reverse=True)
+    assert [age for page in pages for age in page["age"].tolist()] == list(range(24, -1, -1))
+
+
+def test_page_after_delete_skips_nothing(backend):
+    backend.insert_records("bookings", [{"name": f"b{i}", "submitted_on": "2024-03-01 09:00:00"} for i in range(6)])
+    first = backend.fetch_page("bookings", 3)
+    backend.delete_booking(int(first["id"].max()))
+    second = backend.fetch_page("bookings", 3, int(first["id"].min()))
+    assert second["name"].tolist() == ["b2", "b1", "b0"]
+
+
+def test_unknown_table_is_rejected(backend):
+    with pytest.raises(ValueError):
+        backend.fetch_page("users; DROP TABLE bookings", 10)
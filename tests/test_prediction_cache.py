@@ -0,0 +1,69 @@
+import os
+import shutil
+
+import joblib
+import pandas as pd
+import pytest
+
+import prediction_pipeline
+from conftest import REPO_DIR
+from compiled_forest import CompiledForest, artifact_hash
+from prediction_pipeline import process_prediction, reload_artifacts, get_compiled_model
+
+
+@pytest.fixture(scope="module")
+def patients():
+    df = pd.read_csv(os.path.join(REPO_DIR, "realistic_patient_symptom_features.csv"))
+    return df.drop(columns=["Patient_ID", "Disease"]).to_dict("records")
+
+
+def _install_forest(paths, max_depth=None):
+    """Write a compiled export of the served model, optionally truncated to change its predictions."""
+    model = joblib.load(paths["model"])
+    directory = f"{paths['compiled']}.new"
+    CompiledForest.from_model(model, max_depth=max_depth).save(directory, source=artifact_hash(paths["model"]))
+    shutil.rmtree(paths["compiled"], ignore_errors=True)
+    os.replace(directory, paths["compiled"])
+
+
+def _changed_by_truncation(paths, patients, max_depth=2):
+    """A patient the truncated forest classifies differently."""
+    full = CompiledForest.from_model(joblib.load(paths["model"]))
+    truncated = CompiledForest.from_model(joblib.load(paths["model"]), max_depth=max_depth)
+    preprocessor = joblib.load(paths["preprocessor"])
+    for patient in patients:
+        X = preprocessor.transform(pd.DataFrame([patient]))
+        if full.predict(X)[0] != truncated.predict(X)[0]:
+            return patient
+    pytest.skip("no patient changes class at this depth")
+
+
+def test_repeated_patient_is_served_from_cache(artifacts, patients):
+    first = process_prediction(patients[0])
+    second = process_prediction(dict(patients[0], Fever=patients[0]["Fever"] + 1e-9))
+    assert list(second[1]) == list(first[1])
+    assert prediction_pipeline.prediction_cache_stats()["hits"] == 1
+
+    # Callers get copies
+    second[1][0] = "changed"
+    assert list(process_prediction(patients[0])[1]) == list(first[1])
+
+
+def test_cache_cleared_when_compiled_forest_is_replaced(artifacts, patients):
+    _install_forest(artifacts)
+    patient = _changed_by_truncation(artifacts, patients)
+    before = process_prediction(patient)[1]
+
+    _install_forest(artifacts, max_depth=2)
+    X, after = process_prediction(patient)
+    assert list(after) == list(get_compiled_model().predict(X.to_numpy()))
+    assert list(after) != list(before)
+    assert prediction_pipeline.prediction_cache_stats()["invalidations"] == 1
+
+
+def test_reload_clears_cache(artifacts, patients):
+    process_prediction(patients[0])
+    reload_artifacts()
+    assert prediction_pipeline.prediction_cache_stats()["entries"] == 0
+    process_prediction(patients[0])
+    assert prediction_pipeline.prediction_cache_stats()["hits"] == 0
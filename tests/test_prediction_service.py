@@ -0,0 +1,91 @@
+import os
+import json
+import asyncio
+
+import pandas as pd
+import pytest
+
+import prediction_service
+from conftest import REPO_DIR
+from prediction_pipeline import process_prediction
+from prediction_service import MicroBatcher, app
+
+
+@pytest.fixture(scope="module")
+def patients():
+    df = pd.read_csv(os.path.join(REPO_DIR, "realistic_patient_symptom_features.csv"))
+    return df.drop(columns=["Patient_ID", "Disease"]).head(20).to_dict("records")
+
+
+async def _submit_all(batcher, records):
+    try:
+        return await asyncio.gather(*(batcher.submit(record) for record in records), return_exceptions=True)
+    finally:
+        await batcher.stop()
+
+
+def test_concurrent_requests_share_a_batch(patients, monkeypatch):
+    batches = []
+
+    def score(records):
+        batches.append(len(records))
+        return [({"n": i}, record["Gender"]) for i, record in enumerate(records)]
+
+    monkeypatch.setattr(prediction_service, "_score", score)
+    results = asyncio.run(_submit_all(MicroBatcher(window_ms=50, max_batch=8), patients))
+
+    assert batches == [8, 8, 4]
+    assert [prediction for _, prediction in results] == [record["Gender"] for record in patients]
+
+
+def test_batched_predictions_match_in_process(artifacts, patients):
+    batcher = MicroBatcher(window_ms=50)
+    results = asyncio.run(_submit_all(batcher, patients))
+    expected = process_prediction(pd.DataFrame.from_records(patients))[1]
+    assert [prediction for _, prediction in results] == [str(p) for p in expected]
+    assert batcher.stats()["batches"] == 1
+
+
+def test_bad_record_fails_alone(artifacts, patients):
+    broken = {key: value for key, value in patients[1].items() if key != "Fever"}
+    results = asyncio.run(_submit_all(MicroBatcher(window_ms=50), [patients[0], broken, patients[2]]))
+    assert isinstance(results[1], ValueError)
+    assert all(isinstance(results[i], tuple) for i in (0, 2))
+
+
+def _call(method, path, body=b""):
+    """Run one request through the ASGI app; returns (status, JSON body)."""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        scope = {"type": "http", "method": method, "path": path}
+        try:
+            await app(scope, receive, send)
+        finally:
+            await prediction_service._batcher.stop()
+
+    asyncio.run(run())
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+def test_app_routes(artifacts, patients, monkeypatch):
+    monkeypatch.setattr(prediction_service, "_batcher", MicroBatcher(window_ms=1))
+
+    status, body = _call("POST", "/predict", json.dumps(patients[0]).encode())
+    assert status == 200
+    assert body["prediction"] == str(process_prediction(patients[0])[1][0])
+
+    assert _call("POST", "/predict", b"not json")[0] == 400
+    assert _call("POST", "/predict", b"[1, 2]")[0] == 400
+    assert _call("POST", "/predict", json.dumps({"Age": 30}).encode())[0] == 422
+    assert _call("GET", "/missing")[0] == 404
+
+    status, body = _call("GET", "/health")
+    assert status == 200
+    assert body["requests"] == 2
@@ -0,0 +1,48 @@
+from conftest import scalar
+
+
+def _rollups(store):
+    # A day whose bookings were all deleted keeps a zero row; a rebuild leaves it out
+    bookings = store.read_frame("SELECT day, bookings FROM daily_bookings WHERE bookings > 0 ORDER BY day")
+    predictions = store.read_frame("SELECT * FROM daily_predictions WHERE predictions > 0 "
+                                   "ORDER BY day, predicted_disease")
+    return bookings.to_dict("records"), predictions.to_dict("records")
+
+
+def _assert_rollups_match_rebuild(store):
+    incremental = _rollups(store)
+    store.rebuild_rollups()
+    assert incremental == _rollups(store)
+
+
+def test_rollups_match_rebuild_after_inserts_and_deletes(backend):
+    backend.insert_records("bookings", [
+        {"name": "A", "submitted_on": "2024-03-01 09:00:00"},
+        {"name": "B", "submitted_on": "2024-03-01 17:30:00"},
+        {"name": "C", "submitted_on": "2024-03-02 08:15:00"},
+    ])
+    backend.insert_records("predictions", [
+        {"age": 30, "fever": 38.5, "cough": 1, "predicted_disease": "Flu", "predicted_on": "2024-03-01 10:00:00"},
+        {"age": 41, "fever": 37.0, "headache": 1, "predicted_disease": "Flu", "predicted_on": "2024-03-01 11:00:00"},
+        {"age": 25, "fatigue": 1, "predicted_disease": None, "predicted_on": "2024-03-02 12:00:00"},
+    ])
+    _assert_rollups_match_rebuild(backend)
+
+    backend.delete_booking(scalar(backend, "SELECT MIN(id) FROM bookings"))
+    backend.delete_booking(scalar(backend, "SELECT MAX(id) FROM bookings"))
+    backend.insert_records("bookings", [{"name": "D", "submitted_on": "2024-03-03 10:00:00"}])
+    _assert_rollups_match_rebuild(backend)
+
+
+def test_dashboard_reads_come_from_the_rollups(backend):
+    backend.insert_records("predictions", [
+        {"cough": 1, "fever": 39.0, "predicted_disease": "Flu", "predicted_on": "2024-03-01 10:00:00"},
+        {"cough": 1, "predicted_disease": "Flu", "predicted_on": "2024-03-02 10:00:00"},
+        {"cough": 0, "predicted_disease": "Malaria", "predicted_on": "2024-03-02 11:00:00"},
+    ])
+    backend.insert_records("bookings", [{"name": "A", "submitted_on": "2024-03-01 09:00:00"}])
+
+    counts = backend.count_predictions_by_disease()
+    assert dict(zip(counts["predicted_disease"], counts["count"])) == {"Flu": 2, "Malaria": 1}
+    assert backend.daily_bookings("2024-03-01", "2024-03-01")["count"].tolist() == [1]
+    assert backend.daily_bookings("2024-03-02", "2024-03-31").empty
@@ -0,0 +1,79 @@
+import os
+import json
+import shutil
+import logging
+
+import numpy as np
+
+import prediction_pipeline
+from compiled_forest import CompiledForest, artifact_hash
+from prediction_pipeline import reload_artifacts, get_compiled_model, process_prediction
+
+PATIENT = {
+    "Age": 34, "Gender": "Female", "Fever": 38.2, "Cough": 1, "Headache": 1, "Fatigue": 1, "Nausea": 0,
+    "Muscle_Pain": 1, "Shortness_of_Breath": 0, "Loss_of_Taste": 0, "Abdominal_Pain": 0, "Appetite_Loss": 1,
+    "Frequent_Urination": 0, "Thirst_Level": 0, "Blurred_Vision": 0, "Symptom_Duration_Days": 3, "Severity(1-5)": 2,
+}
+
+
+def _forbid_unpickling(monkeypatch):
+    """Fail if serving unpickles anything instead of mapping the compiled exports."""
+    def unexpected(path, *args, **kwargs):
+        raise AssertionError(f"unpickled {path}")
+
+    monkeypatch.setattr(prediction_pipeline.joblib, "load", unexpected)
+
+
+def _source(path):
+    with open(path) as f:
+        return json.load(f)["source"]
+
+
+def test_first_load_writes_the_exports(artifacts):
+    assert not os.path.exists(artifacts["compiled"])
+    reload_artifacts()
+    assert _source(os.path.join(artifacts["compiled"], "forest.json")) == artifact_hash(artifacts["model"])
+    assert _source(artifacts["compiled_preprocessor"]) == artifact_hash(artifacts["preprocessor"])
+    assert isinstance(get_compiled_model().feature, np.memmap)
+
+
+def test_other_workers_map_the_written_exports(artifacts, monkeypatch):
+    expected = process_prediction(PATIENT)[1]
+    # A new worker: nothing loaded yet
+    monkeypatch.setattr(prediction_pipeline, "_artifacts", None)
+    _forbid_unpickling(monkeypatch)
+    assert list(process_prediction(PATIENT)[1]) == list(expected)
+    assert isinstance(get_compiled_model().feature, np.memmap)
+
+
+def test_copied_exports_still_match(artifacts, tmp_path, tmp_path_factory, monkeypatch):
+    reload_artifacts()
+    expected = process_prediction(PATIENT)[1]
+
+    # Copy without preserving mtimes, as a deploy or plain cp would
+    copy_dir = tmp_path_factory.mktemp("copy") / "version"
+    shutil.copytree(tmp_path, copy_dir, copy_function=shutil.copyfile)
+    copied = {key: value if key == "version" else str(copy_dir / os.path.relpath(value, tmp_path))
+              for key, value in artifacts.items()}
+    monkeypatch.setattr(prediction_pipeline, "artifact_paths", lambda: copied)
+    monkeypatch.setattr(prediction_pipeline, "_artifacts", None)
+    _forbid_unpickling(monkeypatch)
+    assert list(process_prediction(PATIENT)[1]) == list(expected)
+
+
+def test_stale_export_is_replaced(artifacts):
+    forest = CompiledForest.from_model(prediction_pipeline.joblib.load(artifacts["model"]), max_depth=1)
+    forest.save(artifacts["compiled"], source="compiled from another model")
+    reload_artifacts()
+    assert _source(os.path.join(artifacts["compiled"], "forest.json")) == artifact_hash(artifacts["model"])
+    assert get_compiled_model().max_depth > 1
+
+
+def test_unwritable_export_warns_and_still_serves(artifacts, tmp_path, caplog):
+    blocker = tmp_path / "read-only"
+    blocker.write_text("a file, so no directory can be created under it")
+    artifacts["compiled"] = str(blocker / "compiled")
+    with caplog.at_level(logging.WARNING):
+        reload_artifacts()
+        assert len(process_prediction(PATIENT)[1]) == 1
+    assert any("compiled_forest.py" in record.getMessage() for record in caplog.records)
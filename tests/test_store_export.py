@@ -0,0 +1,58 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import store_export
+from store_export import export_table
+
+
+@pytest.fixture
+def store(backend, monkeypatch):
+    monkeypatch.setattr(store_export, "backend", backend)
+    monkeypatch.setattr(store_export, "flush_writes", lambda: None)
+    return backend
+
+
+def _add_predictions(store):
+    store.insert_records("predictions", [
+        {"age": 30 + i, "predicted_disease": "Flu" if i % 2 else None, "predicted_on": f"2024-03-{1 + i:02d} 10:00:00"}
+        for i in range(6)
+    ])
+
+
+def test_parquet_keeps_column_types_across_chunks(store, tmp_path):
+    _add_predictions(store)
+    path = str(tmp_path / "predictions.parquet")
+    # The first chunk's predicted_disease is all empty
+    assert export_table("predictions", path, ["age", "predicted_disease", "predicted_on"], chunksize=1) == 6
+    frame = pd.read_parquet(path)
+    assert frame["age"].tolist() == list(range(30, 36))
+    assert str(frame["predicted_disease"].dtype) in ("object", "string")
+    assert frame["predicted_disease"].tolist()[:2] == [None, "Flu"]
+    assert pd.api.types.is_datetime64_any_dtype(frame["predicted_on"])
+
+
+def test_csv_with_date_range(store, tmp_path):
+    _add_predictions(store)
+    path = str(tmp_path / "predictions.csv")
+    rows = export_table("predictions", path, ["AGE"], start=date(2024, 3, 2), end=date(2024, 3, 4), chunksize=2)
+    assert rows == 3
+    assert pd.read_csv(path)["age"].tolist() == [31, 32, 33]
+
+
+def test_empty_csv_still_has_a_header(store, tmp_path):
+    path = str(tmp_path / "bookings.csv")
+    assert export_table("bookings", path, ["name", "submitted_on"]) == 0
+    with open(path) as f:
+        assert f.read().strip() == "name,submitted_on"
+
+
+def test_unknown_column_is_rejected(store, tmp_path):
+    with pytest.raises(ValueError, match="secret"):
+        export_table("bookings", str(tmp_path / "bookings.parquet"), ["name", "secret"])
+
+
+def test_spooled_writes_are_exported(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(store_export, "flush_writes", lambda: _add_predictions(store))
+    assert export_table("predictions", str(tmp_path / "predictions.csv")) == 6
@@ -0,0 +1,64 @@
+import pytest
+
+from store_backends import split_tags, normalise_tag
+
+
+@pytest.mark.parametrize("value, tags", [
+    ("Dust and Pollen, Nuts", ["dust", "pollen", "nuts"]),
+    ("Peanuts; peanuts ;PEANUTS", ["peanuts"]),
+    ("['Cough', 'Fever']", ["cough", "fever"]),
+    ('"Back  Pain"', ["back pain"]),
+    ("Sand, Brandy", ["sand", "brandy"]),
+    ("Dust AND Mold", ["dust", "mold"]),
+    (" , ;", []),
+    ("", []),
+    (None, []),
+    (float("nan"), []),
+    (42, ["42"]),
+])
+def test_split_tags(value, tags):
+    assert split_tags(value) == tags
+
+
+def test_normalise_tag():
+    assert normalise_tag("  Hay\tFever ") == "hay fever"
+    assert normalise_tag("STRASSE") == normalise_tag("straße")
+
+
+def test_tags_are_case_folded_on_write_and_query(backend):
+    backend.insert_records("bookings", [
+        {"allergies": "Peanuts", "submitted_on": "2024-03-01 09:00:00"},
+        {"allergies": "peanuts  and Dust", "problem": "Fever", "submitted_on": "2024-03-01 10:00:00"},
+    ])
+    assert sorted(backend.tag_values("allergies")) == ["dust", "peanuts"]
+    assert int(backend.daily_bookings(tags={"allergies": "PEANUTS"})["count"].sum()) == 2
+    assert int(backend.daily_bookings(tags={"allergies": "Peanuts", "problem": "fever"})["count"].sum()) == 1
+    with pytest.raises(ValueError):
+        backend.daily_bookings(tags={"name": "A"})
+
+
+def test_tags_match_backfill_after_inserts_and_deletes(backend):
+    backend.insert_records("bookings", [
+        {"problem": "Headache, Fever", "allergies": "Peanuts", "submitted_on": "2024-03-01 09:00:00"},
+        {"problem": "fever", "smoke_or_alcohol": "No", "submitted_on": "2024-03-02 08:15:00"},
+    ])
+    first_id = int(backend.read_frame("SELECT MIN(id) AS id FROM bookings")["id"][0])
+    backend.delete_booking(first_id)
+    backend.insert_records("bookings", [{"allergies": "Dust and Pollen", "submitted_on": "2024-03-02 10:00:00"}])
+
+    query = "SELECT booking_id, field, tag FROM booking_tags ORDER BY booking_id, field, tag"
+    incremental = backend.read_frame(query).to_dict("records")
+    backend.rebuild_rollups()
+    assert incremental == backend.read_frame(query).to_dict("records")
+
+
+def test_summarise_bookings_filters_by_tag(backend):
+    backend.insert_records("bookings", [
+        {"allergies": "Peanuts", "sleep_hours": 6, "submitted_on": "2024-03-01 09:00:00"},
+        {"allergies": "Dust", "sleep_hours": 8, "submitted_on": "2024-03-01 10:00:00"},
+        {"allergies": "peanuts", "sleep_hours": 10, "submitted_on": "2024-03-02 10:00:00"},
+    ])
+    summary = backend.summarise_bookings(tags={"allergies": "peanuts"})
+    assert summary.loc["count", "sleep_hours"] == 2
+    assert summary.loc["mean", "sleep_hours"] == pytest.approx(8)
+    assert summary.loc["min", "sleep_hours"] == 6
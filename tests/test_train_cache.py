@@ -0,0 +1,63 @@
+import os
+import copy
+
+import pandas as pd
+import pytest
+
+import train
+from conftest import REPO_DIR
+
+
+@pytest.fixture
+def data(tmp_path):
+    path = tmp_path / "patients.csv"
+    pd.read_csv(os.path.join(REPO_DIR, train.DATA_PATH)).head(50).to_csv(path, index=False)
+    return str(path)
+
+
+def _cached(data_path, cache_dir, config=train.PREPROCESSOR_CONFIG):
+    return train.preprocess_cached(pd.read_csv(data_path), data_path, str(cache_dir), config)
+
+
+def _entries(cache_dir):
+    return sorted(os.listdir(cache_dir))
+
+
+def test_second_call_reuses_the_cache(data, tmp_path, monkeypatch, capsys):
+    cache_dir = tmp_path / "cache"
+    _, X_first, _ = _cached(data, cache_dir)
+    monkeypatch.setattr(train, "build_preprocessor", lambda config: pytest.fail("refitted a cached matrix"))
+    _, X_second, y = _cached(data, cache_dir)
+    assert (X_second == X_first).all()
+    assert len(y) == 50
+    assert "Reusing cached" in capsys.readouterr().out
+
+
+def test_changed_bytes_config_or_sklearn_recompute(data, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    _cached(data, cache_dir)
+    assert len(_entries(cache_dir)) == 1
+
+    # Same rows, different bytes
+    with open(data, "a") as f:
+        f.write("\n")
+    _cached(data, cache_dir)
+    assert len(_entries(cache_dir)) == 2
+
+    config = copy.deepcopy(train.PREPROCESSOR_CONFIG)
+    config["onehot_drop"] = None
+    _cached(data, cache_dir, config)
+    assert len(_entries(cache_dir)) == 3
+
+    monkeypatch.setattr(train.sklearn, "__version__", "0.0-test")
+    _cached(data, cache_dir)
+    assert len(_entries(cache_dir)) == 4
+
+
+def test_registry_records_the_cache_data_hash(data, tmp_path, monkeypatch):
+    recorded = {}
+    monkeypatch.setattr(train, "register_version", lambda preprocessor, model, metadata: recorded.update(metadata))
+    preprocessor, X_transformed, _ = _cached(data, tmp_path / "cache")
+    df = pd.read_csv(data)
+    train.train_store_model(df, preprocessor, data, X_transformed, params={"n_estimators": 5}, n_jobs=1)
+    assert recorded["data_hash"] == train.artifact_hash(data)
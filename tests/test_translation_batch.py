@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+import translate_input
+from translate_input import TranslationCache, trans_text_batch
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """Fake remote provider; records every text it is asked for."""
+    calls = []
+    lock = threading.Lock()
+
+    def fetch(text, language):
+        with lock:
+            calls.append(text)
+        if text == "Broken":
+            raise ConnectionError("provider unavailable")
+        translation = f"{text} [{language}]"
+        translate_input._cache.put(text, language, translation)
+        return translation
+
+    monkeypatch.setattr(translate_input, "_cache", TranslationCache(db_path=None))
+    monkeypatch.setattr(translate_input, "catalog_lookup", lambda text, language: None)
+    monkeypatch.setattr(translate_input, "_fetch_translation", fetch)
+    return calls
+
+
+def test_keeps_order_and_fetches_duplicates_once(provider):
+    texts = ["Name", "Age", "Name", "Book", "Age"]
+    assert trans_text_batch(texts, "fr") == [f"{text} [fr]" for text in texts]
+    assert sorted(provider) == ["Age", "Book", "Name"]
+
+
+def test_only_misses_reach_the_provider(provider, monkeypatch):
+    translate_input._cache.put("Name", "fr", "Nom")
+    monkeypatch.setattr(translate_input, "catalog_lookup",
+                        lambda text, language: "Réserver" if text == "Book" else None)
+    assert trans_text_batch(["Name", "Book", "Age"], "fr") == ["Nom", "Réserver", "Age [fr]"]
+    assert provider == ["Age"]
+
+
+def test_failed_text_is_returned_unchanged(provider):
+    assert trans_text_batch(["Name", "Broken"], "fr") == ["Name [fr]", "Broken"]
+
+
+def test_english_is_passed_through(provider):
+    assert trans_text_batch(("Name", "Age"), "en") == ["Name", "Age"]
+    assert provider == []
@@ -0,0 +1,39 @@
+from translate_input import TranslationCache
+
+
+def test_memory_tier_evicts_least_recently_used_by_bytes():
+    cache = TranslationCache(db_path=None, max_bytes=20)
+    cache.put("one", "fr", "un")        # 5 bytes
+    cache.put("two", "fr", "deux")      # 7 bytes
+    cache.get("one", "fr")
+    cache.put("three", "fr", "trois")   # 10 bytes: "two" is least recently used
+    assert cache.get("two", "fr") is None
+    assert cache.get("one", "fr") == "un"
+    assert cache.get("three", "fr") == "trois"
+    assert cache.stats()["bytes"] <= 20
+
+
+def test_size_counts_utf8_bytes():
+    cache = TranslationCache(db_path=None, max_bytes=1024)
+    cache.put("Submit", "yo", "Fi ranṣẹ")
+    assert cache.stats()["bytes"] == len("Submit") + len("Fi ranṣẹ".encode("utf-8"))
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.db")
+    TranslationCache(db_path=path).put("Book", "fr", "Réserver")
+
+    cache = TranslationCache(db_path=path)
+    assert cache.get("Book", "fr") == "Réserver"
+    assert cache.get("Book", "fr") == "Réserver"
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 0)
+
+
+def test_provider_warnings_are_not_cached(tmp_path):
+    cache = TranslationCache(db_path=str(tmp_path / "cache.db"))
+    cache.put("Book", "fr", "MYMEMORY WARNING: YOU USED ALL AVAILABLE FREE TRANSLATIONS FOR TODAY")
+    cache.put("Name", "fr", None)
+    assert cache.get("Book", "fr") is None
+    assert cache.get("Name", "fr") is None
+    assert cache.stats()["misses"] == 2
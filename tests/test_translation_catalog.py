@@ -0,0 +1,57 @@
+import os
+
+import translate_input
+import translation_catalog
+from conftest import REPO_DIR
+from translation_catalog import (
+    Catalog, write_catalog, get_catalog, extract_strings, build_catalogs, _catalog_path,
+)
+
+
+def test_catalog_dir_is_relative_to_the_app():
+    assert os.path.isabs(translation_catalog.CATALOG_DIR)
+    assert os.path.dirname(translation_catalog.CATALOG_DIR) == REPO_DIR
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "fr.cat")
+    translations = {f"Label {i}": f"Étiquette {i}" for i in range(200)}
+    write_catalog(path, translations)
+    catalog = Catalog(path)
+    assert catalog.count == 200
+    assert all(catalog.get(source) == translated for source, translated in translations.items())
+    assert catalog.get("Not in the catalog") is None
+
+
+def test_catalog_built_later_is_picked_up(tmp_path):
+    catalog_dir = str(tmp_path)
+    assert get_catalog("yo", catalog_dir) is None
+    write_catalog(_catalog_path("yo", catalog_dir), {"Submit": "Fi ranṣẹ"})
+    assert get_catalog("yo", catalog_dir).get("Submit") == "Fi ranṣẹ"
+
+
+def test_extract_strings(tmp_path):
+    source = tmp_path / "page.py"
+    source.write_text(
+        'T("Book")\n'
+        'trans_text("Name", lang)\n'
+        'trans_text_batch(["Age", "Book", label], lang)\n'
+        'T(f"Hello {name}")\n'
+        'print("not UI text")\n'
+    )
+    assert extract_strings([str(source)]) == ["Book", "Name", "Age"]
+
+
+def test_build_keeps_provider_warnings_out(tmp_path, monkeypatch, capsys):
+    source = tmp_path / "page.py"
+    source.write_text('trans_text_batch(["Book", "Name", "Age", "OK"], lang)\n')
+    replies = {"Book": "Réserver", "Name": "MYMEMORY WARNING: YOU USED ALL AVAILABLE FREE TRANSLATIONS",
+               "Age": None, "OK": "OK"}
+    monkeypatch.setattr(translate_input, "trans_text_batch", lambda texts, language: [replies[t] for t in texts])
+
+    build_catalogs(["fr"], sources=[str(source)], catalog_dir=str(tmp_path))
+    catalog = Catalog(_catalog_path("fr", str(tmp_path)))
+    assert catalog.count == 1
+    assert catalog.get("Book") == "Réserver"
+    assert catalog.get("Name") is None
+    assert "2 failed" in capsys.readouterr().out
@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import translate_input
+from translate_input import PooledMyMemoryProvider, _get_translator
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool(monkeypatch):
+    monkeypatch.setattr(translate_input, "_translators", {})
+
+
+def test_one_translator_per_language():
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        translators = list(pool.map(_get_translator, ["fr"] * 16))
+    assert all(translator is translators[0] for translator in translators)
+    assert _get_translator("yo") is not translators[0]
+
+
+def test_translators_share_the_session():
+    providers = [_get_translator(language).provider for language in ("fr", "yo", "ha")]
+    assert all(isinstance(provider, PooledMyMemoryProvider) for provider in providers)
+    assert all(provider.session is translate_input._session for provider in providers)
+
+
+def test_requests_go_through_the_session_with_timeouts(monkeypatch):
+    sent = {}
+
+    class Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"responseData": {"translatedText": "Réserver"}, "matches": []}
+
+    def get(url, params, headers, timeout):
+        sent.update(url=url, params=params, timeout=timeout)
+        return Response()
+
+    monkeypatch.setattr(translate_input._session, "get", get)
+    assert _get_translator("fr").translate("Book") == "Réserver"
+    assert sent["params"]["q"] == "Book"
+    assert sent["timeout"] == (translate_input.TRANSLATION_CONNECT_TIMEOUT, translate_input.TRANSLATION_READ_TIMEOUT)
@@ -0,0 +1,91 @@
+import pytest
+
+import write_behind
+from write_behind import WriteBehindQueue, DatabaseUnavailable
+
+
+class FakeDatabase:
+    """write_batch/ping stand-ins: rows named "bad" are rejected, and ``down`` simulates an outage."""
+
+    def __init__(self):
+        self.rows = []
+        self.down = False
+
+    def write_batch(self, table, records):
+        if self.down:
+            raise ConnectionError("connection refused")
+        if any(record.get("name") == "bad" for record in records):
+            raise ValueError("rejected row")
+        self.rows.extend((table, record) for record in records)
+
+    def ping(self):
+        if self.down:
+            raise ConnectionError("connection refused")
+
+
+@pytest.fixture
+def database():
+    return FakeDatabase()
+
+
+@pytest.fixture
+def queue(database, tmp_path, monkeypatch):
+    queue = WriteBehindQueue(database.write_batch, ping=database.ping, path=str(tmp_path / "spool.db"),
+                             flush_interval=0, max_backoff=0)
+    # Flush in the test thread only
+    monkeypatch.setattr(queue, "start", lambda: None)
+    return queue
+
+
+def test_flush_writes_spooled_rows_in_order(queue, database):
+    for i in range(3):
+        queue.enqueue("predictions", {"name": f"p{i}"})
+    assert queue.stats() == {"pending": 3, "failed": 0}
+    assert queue.flush() == 3
+    assert [record["name"] for _, record in database.rows] == ["p0", "p1", "p2"]
+    assert queue.stats() == {"pending": 0, "failed": 0}
+
+
+def test_rejected_row_is_retried_then_set_aside(queue, database):
+    queue.enqueue("bookings", {"name": "good"})
+    queue.enqueue("bookings", {"name": "bad"})
+    queue.enqueue("bookings", {"name": "also good"})
+
+    # The good rows of a rejected batch are written one by one
+    queue.flush_once()
+    assert [record["name"] for _, record in database.rows] == ["good", "also good"]
+    assert queue.stats() == {"pending": 1, "failed": 0}
+
+    for _ in range(write_behind.SPOOL_MAX_ATTEMPTS - 1):
+        queue.flush()
+    assert queue.stats() == {"pending": 0, "failed": 1}
+    assert queue.flush() == 0
+    assert len(database.rows) == 2
+
+
+def test_outage_keeps_rows_spooled(queue, database):
+    queue.enqueue("predictions", {"name": "p0"})
+    queue.enqueue("predictions", {"name": "bad"})
+    database.down = True
+    with pytest.raises(DatabaseUnavailable):
+        queue.flush_once()
+    # Released, not counted as rejections
+    assert queue.stats() == {"pending": 2, "failed": 0}
+
+    # Back up: one attempt each, so the bad row has a single rejection against it
+    database.down = False
+    queue.flush_once()
+    assert [record["name"] for _, record in database.rows] == ["p0"]
+    assert queue.stats() == {"pending": 1, "failed": 0}
+
+
+def test_spooled_rows_survive_a_restart(database, tmp_path):
+    path = str(tmp_path / "spool.db")
+    first = WriteBehindQueue(database.write_batch, ping=database.ping, path=path)
+    first.start = lambda: None
+    first.enqueue("bookings", {"name": "kept"})
+
+    second = WriteBehindQueue(database.write_batch, ping=database.ping, path=path)
+    assert second.stats() == {"pending": 1, "failed": 0}
+    second.flush()
+    assert database.rows == [("bookings", {"name": "kept"})]
@@ -1,66 +1,228 @@
+import os
+import time
+import random
+import json
+import hashlib
+import argparse
+import itertools
 import joblib
+import sklearn
+from joblib import Parallel, delayed
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.pipeline import Pipeline
 from sklearn.metrics import accuracy_score
 import pandas as pd
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.compose import ColumnTransformer
+from model_registry import register_version
+from compiled_forest import artifact_hash
 
-def preprocess(df):
-    categorical_cols = ['Gender']
-    numeric_scale_cols = ['Age', 'Fever', 'Symptom_Duration_Days']
-    binary_cols = [
+DATA_PATH = "realistic_patient_symptom_features.csv"
+TRAIN_CACHE_DIR = os.getenv("TRAIN_CACHE_DIR", ".train_cache")
+
+# Forest settings used by a plain training run
+DEFAULT_PARAMS = {"n_estimators": 200}
+
+# Hyperparameters explored by --search
+SEARCH_SPACE = {
+    "n_estimators": [25, 50, 100, 200],
+    "max_depth": [None, 8, 12, 16],
+    "min_samples_leaf": [1, 2, 4],
+    "max_features": ["sqrt", "log2"],
+}
+
+
+# Feature columns and encoding; also part of the cache key of the transformed features
+PREPROCESSOR_CONFIG = {
+    "categorical_cols": ['Gender'],
+    "numeric_scale_cols": ['Age', 'Fever', 'Symptom_Duration_Days'],
+    "binary_cols": [
         'Cough', 'Headache', 'Fatigue', 'Nausea', 'Muscle_Pain',
         'Shortness_of_Breath', 'Loss_of_Taste', 'Abdominal_Pain',
         'Appetite_Loss', 'Frequent_Urination', 'Thirst_Level',
         'Blurred_Vision', 'Severity(1-5)'
-    ]
+    ],
+    "onehot_drop": 'first',
+    "dropped_cols": ['Patient_ID', 'Disease'],
+    "target_col": 'Disease',
+}
+
 
-    categorical_transformer = OneHotEncoder(drop='first', sparse_output=False)
+def build_preprocessor(config=PREPROCESSOR_CONFIG):
+    categorical_transformer = OneHotEncoder(drop=config['onehot_drop'], sparse_output=False)
     numeric_transformer = StandardScaler()
 
-    preprocessor = ColumnTransformer(
+    return ColumnTransformer(
         transformers=[
-            ('cat', categorical_transformer, categorical_cols),
-            ('num', numeric_transformer, numeric_scale_cols),
-            ('binary', 'passthrough', binary_cols)
+            ('cat', categorical_transformer, config['categorical_cols']),
+            ('num', numeric_transformer, config['numeric_scale_cols']),
+            ('binary', 'passthrough', config['binary_cols'])
         ]
     )
 
-    # ⚙️ Fit only on features (exclude Disease + ID)
-    X = df.drop(columns=['Patient_ID', 'Disease'])
-    preprocessor.fit(X)
 
-    joblib.dump(preprocessor, "preprocessor.pkl")
-    return preprocessor
+def preprocess_cached(df, data_path=DATA_PATH, cache_dir=TRAIN_CACHE_DIR, config=PREPROCESSOR_CONFIG):
+    """Fit the preprocessor and transform the features in one pass, cached on disk.
 
+    ``df`` must be the contents of ``data_path``. The cache key is a hash of
+    that file, the scikit-learn version and ``config``, so changing any of
+    them recomputes. Returns (preprocessor, X_transformed, y).
+    """
+    key = json.dumps({
+        "data": artifact_hash(data_path),
+        "sklearn": sklearn.__version__,
+        "config": config,
+    }, sort_keys=True)
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    path = os.path.join(cache_dir, f"transformed-{digest[:16]}.joblib")
+    if os.path.exists(path):
+        preprocessor, X_transformed, y = joblib.load(path)
+        print(f"♻️ Reusing cached feature matrix {path}")
+        return preprocessor, X_transformed, y
 
-def train_store_model(df, preprocessor, save_path="disease_predictor.pkl"):
+    preprocessor = build_preprocessor(config)
+    X = df.drop(columns=config['dropped_cols'])
+    y = df[config['target_col']]
+    X_transformed = preprocessor.fit_transform(X)
 
-    X = df.drop(columns=['Patient_ID', 'Disease'])
-    y = df['Disease']
+    os.makedirs(cache_dir, exist_ok=True)
+    joblib.dump((preprocessor, X_transformed, y), path)
+    return preprocessor, X_transformed, y
 
-    X_transformed = preprocessor.transform(X)
 
-    model = RandomForestClassifier(
-        n_estimators=200, random_state=42, class_weight='balanced'
-    )
-
-    X_train, X_test, y_train, y_test = train_test_split(
+def _split(X_transformed, y):
+    return train_test_split(
         X_transformed, y, test_size=0.2, random_state=42, stratify=y
     )
 
+
+def _fit_forest(X_train, y_train, params, n_jobs):
+    model = RandomForestClassifier(
+        random_state=42, class_weight='balanced', n_jobs=n_jobs, **params
+    )
     model.fit(X_train, y_train)
-    joblib.dump(model, save_path)
+    # Serve single-threaded: per-call thread start-up dominates small predictions
+    model.set_params(n_jobs=None)
+    return model
+
+
+def train_store_model(df, preprocessor, data_path=DATA_PATH, X_transformed=None, params=None, n_jobs=-1):
+    """Train the forest on all cores, register it as the active model version and return its accuracy."""
+    start = time.perf_counter()
+
+    y = df['Disease']
+    if X_transformed is None:
+        X_transformed = preprocessor.transform(df.drop(columns=['Patient_ID', 'Disease']))
+
+    X_train, X_test, y_train, y_test = _split(X_transformed, y)
+
+    model = _fit_forest(X_train, y_train, params or DEFAULT_PARAMS, n_jobs)
 
     acc = accuracy_score(y_test, model.predict(X_test))
+
+    version = register_version(preprocessor, model, {
+        "accuracy": acc,
+        "training_seconds": round(time.perf_counter() - start, 3),
+        "data_path": data_path,
+        # Same hash of the data file as the feature cache key
+        "data_hash": artifact_hash(data_path),
+        "n_rows": len(df),
+    })
+    print(f"✅ Registered model version {version}")
     return acc
 
 
+# --- HYPERPARAMETER SEARCH ---
+def _evaluate(params, X_train, X_test, y_train, y_test):
+    """Fit one configuration and measure what it costs to train and to serve."""
+    from compiled_forest import CompiledForest
+
+    start = time.perf_counter()
+    model = _fit_forest(X_train, y_train, params, n_jobs=1)
+    fit_seconds = time.perf_counter() - start
+
+    forest = CompiledForest.from_model(model)
+    row = X_test[:1]
+    forest.predict(row)
+    start = time.perf_counter()
+    for _ in range(50):
+        forest.predict(row)
+    predict_ms = (time.perf_counter() - start) / 50 * 1000
+
+    return {
+        **params,
+        "accuracy": accuracy_score(y_test, model.predict(X_test)),
+        "fit_seconds": fit_seconds,
+        "n_nodes": int(sum(e.tree_.node_count for e in model.estimators_)),
+        "size_mb": forest.nbytes / 1e6,
+        "predict_ms": predict_ms,
+    }
+
+
+def search_hyperparameters(X_transformed, y, space=SEARCH_SPACE, max_configs=24, budget_seconds=120, n_jobs=-1):
+    """Evaluate random configurations from the search space in parallel.
+
+    Stops after ``max_configs`` configurations or once ``budget_seconds`` have
+    passed, whichever comes first. Returns one result dict per configuration.
+    """
+    X_train, X_test, y_train, y_test = _split(X_transformed, y)
+
+    configs = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    random.Random(42).shuffle(configs)
+    configs = configs[:max_configs]
+
+    results = []
+    start = time.perf_counter()
+    jobs = Parallel(n_jobs=n_jobs, return_as="generator_unordered")(
+        delayed(_evaluate)(params, X_train, X_test, y_train, y_test) for params in configs
+    )
+    for result in jobs:
+        results.append(result)
+        print(_format_result(result))
+        if time.perf_counter() - start > budget_seconds:
+            print(f"⏱️ Search budget of {budget_seconds}s used up after {len(results)} configurations")
+            break
+    return results
+
+
+def choose_config(results, tolerance=0.01):
+    """Smallest model whose accuracy is within tolerance of the best one."""
+    best = max(r["accuracy"] for r in results)
+    candidates = [r for r in results if r["accuracy"] >= best - tolerance]
+    return min(candidates, key=lambda r: (r["n_nodes"], -r["accuracy"]))
+
+
+def _format_result(r):
+    return (
+        f"n_estimators={r['n_estimators']:<4} max_depth={str(r['max_depth']):<5} "
+        f"min_samples_leaf={r['min_samples_leaf']:<2} max_features={r['max_features']:<5} | "
+        f"accuracy={r['accuracy'] * 100:6.2f}%  fit={r['fit_seconds']:6.2f}s  "
+        f"nodes={r['n_nodes']:>7,}  size={r['size_mb']:5.2f}MB  predict={r['predict_ms']:.3f}ms"
+    )
+
+
 # --- RUN ---
-df = pd.read_csv("realistic_patient_symptom_features.csv")
-preprocessor = preprocess(df)
-accuracy = train_store_model(df, preprocessor)
-accuracy = accuracy*100
-print("Training completed with accuracy:", accuracy)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the disease model and register it as a new version.")
+    parser.add_argument("--search", action="store_true", help="run a hyperparameter search first")
+    parser.add_argument("--max-configs", type=int, default=24, help="configurations to try in the search")
+    parser.add_argument("--budget", type=float, default=120, help="search time budget in seconds")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="accuracy the chosen model may give up for a smaller forest")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="parallel jobs (-1 = all cores)")
+    args = parser.parse_args()
+
+    df = pd.read_csv(DATA_PATH)
+    preprocessor, X_transformed, y = preprocess_cached(df, DATA_PATH)
+
+    params = DEFAULT_PARAMS
+    if args.search:
+        results = search_hyperparameters(X_transformed, y, max_configs=args.max_configs,
+                                         budget_seconds=args.budget, n_jobs=args.n_jobs)
+        chosen = choose_config(results, args.tolerance)
+        print("🏆 Chosen:", _format_result(chosen))
+        params = {name: chosen[name] for name in SEARCH_SPACE}
+
+    accuracy = train_store_model(df, preprocessor, X_transformed=X_transformed, params=params, n_jobs=args.n_jobs)
+    accuracy = accuracy*100
+    print("Training completed with accuracy:", accuracy)
@@ -1,8 +1,277 @@
+import os
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
 from translate import Translator
+from translate.providers import MyMemoryProvider
+from translation_catalog import catalog_lookup
+
+# --- CACHE SETTINGS ---
+CACHE_DB_PATH = os.getenv("TRANSLATION_CACHE_DB", "translation_cache.db")
+CACHE_MAX_BYTES = int(os.getenv("TRANSLATION_CACHE_MAX_BYTES", 4 * 1024 * 1024))
+
+# --- BATCH SETTINGS ---
+TRANSLATION_WORKERS = int(os.getenv("TRANSLATION_WORKERS", 8))
+
+# --- PROVIDER CONNECTION SETTINGS ---
+TRANSLATION_CONNECT_TIMEOUT = float(os.getenv("TRANSLATION_CONNECT_TIMEOUT", 3))
+TRANSLATION_READ_TIMEOUT = float(os.getenv("TRANSLATION_READ_TIMEOUT", 10))
+
+# Provider responses that are error notices rather than translations
+PROVIDER_ERROR_PREFIXES = ("MYMEMORY WARNING", "QUERY LENGTH LIMIT")
+
+
+class TranslationCache:
+    """In-process LRU of translations backed by a persistent SQLite store.
+
+    Entries are keyed by (text, language). The memory tier evicts the least
+    recently used entries once the UTF-8 size of the cached strings exceeds
+    ``max_bytes``; the SQLite tier keeps everything across sessions and restarts.
+    """
+
+    def __init__(self, db_path=CACHE_DB_PATH, max_bytes=CACHE_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._disk_enabled = bool(db_path)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _db(self):
+        """Open the SQLite store on first use (caller holds the lock)."""
+        if self._conn is None and self._disk_enabled:
+            try:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS translations (
+                        text TEXT NOT NULL,
+                        lang TEXT NOT NULL,
+                        translation TEXT NOT NULL,
+                        PRIMARY KEY (text, lang)
+                    )
+                    """
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logging.warning(f"Translation cache disabled on disk: {e}")
+                self._disk_enabled = False
+                self._conn = None
+        return self._conn
+
+    def _remember(self, key, translation):
+        """Insert into the memory tier and evict down to the size budget."""
+        if key in self._entries:
+            self._size -= self._entry_size(key, self._entries.pop(key))
+        self._entries[key] = translation
+        self._size += self._entry_size(key, translation)
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            old_key, old_value = self._entries.popitem(last=False)
+            self._size -= self._entry_size(old_key, old_value)
+
+    @staticmethod
+    def _entry_size(key, translation):
+        return len(key[0].encode("utf-8")) + len(translation.encode("utf-8"))
+
+    def get(self, text, language):
+        """Return the cached translation, or None on a miss."""
+        key = (text, language)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return self._entries[key]
+
+            conn = self._db()
+            if conn is not None:
+                try:
+                    row = conn.execute(
+                        "SELECT translation FROM translations WHERE text = ? AND lang = ?",
+                        key,
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logging.warning(f"Translation cache read failed: {e}")
+                    row = None
+                if row is not None:
+                    self.disk_hits += 1
+                    self._remember(key, row[0])
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, text, language, translation):
+        """Store a translation in both tiers."""
+        if not isinstance(translation, str) or translation.startswith(PROVIDER_ERROR_PREFIXES):
+            return
+        key = (text, language)
+        with self._lock:
+            self._remember(key, translation)
+            conn = self._db()
+            if conn is not None:
+                try:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO translations (text, lang, translation) VALUES (?, ?, ?)",
+                        (text, language, translation),
+                    )
+                    conn.commit()
+                except sqlite3.Error as e:
+                    logging.warning(f"Translation cache write failed: {e}")
+
+    def stats(self):
+        """Hit/miss counters and memory tier usage."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
+
+
+_cache = TranslationCache()
+
+
+def cache_stats():
+    """Return hit/miss counters for the translation cache."""
+    return _cache.stats()
+
+
+class PooledMyMemoryProvider(MyMemoryProvider):
+    """MyMemory provider that sends requests through a shared keep-alive session."""
+
+    def __init__(self, session, timeout, **kwargs):
+        super().__init__(**kwargs)
+        self.session = session
+        self.timeout = timeout
+
+    def _make_request(self, text):
+        params = {'q': text, 'langpair': self.languages}
+        if self.email:
+            params['de'] = self.email
+
+        response = self.session.get(self.base_url, params=params, headers=self.headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+def _new_session():
+    """HTTP session keeping up to TRANSLATION_WORKERS connections alive per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=TRANSLATION_WORKERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_session = _new_session()
+_translators = {}
+_translators_lock = threading.Lock()
+
+
+def _get_translator(language):
+    """Return the shared Translator for a language, creating it on first use.
+
+    Translators hold no per-request state, so one instance per language is
+    safe to use from every thread; the session's connection pool is
+    thread-safe and bounded to the batch worker count.
+    """
+    translator = _translators.get(language)
+    if translator is None:
+        with _translators_lock:
+            translator = _translators.get(language)
+            if translator is None:
+                translator = Translator(to_lang = language)
+                translator.provider = PooledMyMemoryProvider(
+                    session=_session,
+                    timeout=(TRANSLATION_CONNECT_TIMEOUT, TRANSLATION_READ_TIMEOUT),
+                    from_lang=translator.from_lang,
+                    to_lang=language,
+                )
+                _translators[language] = translator
+    return translator
+
+
+_executor = ThreadPoolExecutor(max_workers=TRANSLATION_WORKERS, thread_name_prefix="translate")
+
+
+def _fetch_translation(text, language):
+    """Translate with the remote provider and store the result in the cache."""
+    translator = _get_translator(language)
+    translation = translator.translate(text)
+    _cache.put(text, language, translation)
+    return translation
+
+
+def _lookup(text, language):
+    """Find a translation without the network: precompiled catalog first, then the cache."""
+    translation = catalog_lookup(text, language)
+    if translation is not None:
+        return translation
+    return _cache.get(text, language)
+
 
 def trans_text(text, language):
     """Help  translate user texts to user's preferred language"""
-    translator = Translator(to_lang = language)
-    translation = translator.translate(text)
+    cached = _lookup(text, language)
+    if cached is not None:
+        return cached
+
+    return _fetch_translation(text, language)
+
+
+def trans_text_batch(texts, language):
+    """Translate a whole list of texts, returning translations in the same order.
+
+    Duplicates are looked up once and only cache misses go to the provider,
+    concurrently on a bounded thread pool. A text whose translation fails is
+    returned unchanged so one bad request doesn't break the whole page.
+    """
+    texts = list(texts)
+    if language == "en":
+        return texts
+
+    results = {}
+    pending = {}
+    for text in dict.fromkeys(texts):
+        cached = _lookup(text, language)
+        if cached is not None:
+            results[text] = cached
+        else:
+            pending[text] = _executor.submit(_fetch_translation, text, language)
+
+    for text, future in pending.items():
+        try:
+            results[text] = future.result()
+        except Exception as e:
+            logging.warning(f"Translation failed for {text!r}: {e}")
+            results[text] = text
+
+    return [results[text] for text in texts]
+
+
+_background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="translate-prefetch")
+
+
+def lookup_translation(text, language):
+    """Return a translation only if it is available without the network, else None."""
+    if language == "en":
+        return text
+    return _lookup(text, language)
+
 
-    return translation
\ No newline at end of file
+def prefetch_translations(texts, language):
+    """Translate texts in the background; the returned Future resolves once they are cached."""
+    return _background.submit(trans_text_batch, list(dict.fromkeys(texts)), language)
@@ -0,0 +1,187 @@
+import os
+import ast
+import glob
+import mmap
+import struct
+import hashlib
+import argparse
+import threading
+from language_codes import LANGUAGES
+
+# --- CATALOG SETTINGS ---
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# Relative paths are resolved against the app, not the working directory
+CATALOG_DIR = os.path.join(_APP_DIR, os.getenv("TRANSLATION_CATALOG_DIR", "catalogs"))
+SOURCE_FILES = [os.path.join(_APP_DIR, "app.py")] + sorted(glob.glob(os.path.join(_APP_DIR, "pages", "*.py")))
+
+# Call names whose string literal arguments are UI text
+SINGLE_TEXT_CALLS = {"T", "trans_text"}
+BATCH_TEXT_CALLS = {"trans_text_batch"}
+
+# --- FILE FORMAT ---
+# header | index (sorted by key hash) | blob of UTF-8 keys and values
+# Offsets in the index are relative to the start of the blob.
+MAGIC = b"MGCAT001"
+HEADER = struct.Struct("<8sI")       # magic, entry count
+ENTRY = struct.Struct("<QIIII")      # key hash, key offset, key length, value offset, value length
+
+
+def _key_hash(text):
+    """Stable 64-bit hash of a source string (unlike hash(), same in every process)."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _catalog_path(language, catalog_dir=CATALOG_DIR):
+    return os.path.join(catalog_dir, f"{language}.cat")
+
+
+# --- EXTRACTION ---
+def _call_name(node):
+    if isinstance(node.func, ast.Name):
+        return node.func.id
+    if isinstance(node.func, ast.Attribute):
+        return node.func.attr
+    return None
+
+
+def extract_strings(paths=SOURCE_FILES):
+    """Collect every literal passed to T(), trans_text() or trans_text_batch()."""
+    strings = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call) or not node.args:
+                continue
+            name = _call_name(node)
+            arg = node.args[0]
+            if name in SINGLE_TEXT_CALLS:
+                candidates = [arg]
+            elif name in BATCH_TEXT_CALLS and isinstance(arg, (ast.List, ast.Tuple)):
+                candidates = arg.elts
+            else:
+                continue
+            for item in candidates:
+                # f-strings and variables can only be translated at runtime
+                if isinstance(item, ast.Constant) and isinstance(item.value, str):
+                    strings[item.value] = None
+    return list(strings)
+
+
+# --- WRITING ---
+def write_catalog(path, translations):
+    """Write a {source: translation} dict as a compact, mmap-friendly catalog."""
+    entries = []
+    blob = bytearray()
+    for source, translated in translations.items():
+        key = source.encode("utf-8")
+        value = translated.encode("utf-8")
+        entries.append((_key_hash(source), len(blob), len(key), len(blob) + len(key), len(value)))
+        blob += key + value
+    entries.sort()
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(entries)))
+        for entry in entries:
+            f.write(ENTRY.pack(*entry))
+        f.write(blob)
+    os.replace(tmp_path, path)
+
+
+# --- READING ---
+class Catalog:
+    """Read-only, memory-mapped view of one language's catalog file."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a translation catalog")
+        self._blob_start = HEADER.size + self.count * ENTRY.size
+
+    def _entry(self, i):
+        return ENTRY.unpack_from(self._mm, HEADER.size + i * ENTRY.size)
+
+    def get(self, text):
+        """Binary-search the index for text; return its translation or None."""
+        target = _key_hash(text)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        key = text.encode("utf-8")
+        base = self._blob_start
+        # Walk the (rare) run of entries sharing this hash
+        for i in range(lo, self.count):
+            key_hash, key_off, key_len, value_off, value_len = self._entry(i)
+            if key_hash != target:
+                break
+            if self._mm[base + key_off: base + key_off + key_len] == key:
+                return self._mm[base + value_off: base + value_off + value_len].decode("utf-8")
+        return None
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(language, catalog_dir=CATALOG_DIR):
+    """Open a language's catalog on first use; None if it hasn't been built (yet: checked again next time)."""
+    key = (catalog_dir, language)
+    if key not in _catalogs:
+        path = _catalog_path(language, catalog_dir)
+        if not os.path.exists(path):
+            return None
+        with _catalogs_lock:
+            if key not in _catalogs:
+                _catalogs[key] = Catalog(path)
+    return _catalogs[key]
+
+
+def catalog_lookup(text, language):
+    """Return the precompiled translation of text, or None if not in a catalog."""
+    catalog = get_catalog(language)
+    return catalog.get(text) if catalog is not None else None
+
+
+# --- BUILD ---
+def build_catalogs(languages=None, sources=SOURCE_FILES, catalog_dir=CATALOG_DIR):
+    """Translate every static UI string once per language and write the catalogs."""
+    from translate_input import trans_text_batch, PROVIDER_ERROR_PREFIXES
+
+    strings = extract_strings(sources)
+    print(f"📚 Extracted {len(strings)} UI strings from {len(sources)} files")
+
+    for language in languages or LANGUAGES.keys():
+        if language == "en":
+            continue
+        translated = trans_text_batch(strings, language)
+        # Provider warnings come back as ordinary text; they must never be shipped as labels
+        failed = sum(1 for t in translated if not isinstance(t, str) or t.startswith(PROVIDER_ERROR_PREFIXES))
+        # Strings that came back unchanged, failed or untranslatable, are
+        # left out so they keep going through the runtime translation path.
+        translations = {
+            s: t for s, t in zip(strings, translated)
+            if isinstance(t, str) and not t.startswith(PROVIDER_ERROR_PREFIXES) and t != s
+        }
+        path = _catalog_path(language, catalog_dir)
+        write_catalog(path, translations)
+        print(f"✅ {language}: {len(translations)}/{len(strings)} strings -> {path}"
+              + (f" (⚠️ {failed} failed, left to runtime translation)" if failed else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build offline translation catalogs for the UI.")
+    parser.add_argument("--languages", nargs="*", help="language codes (default: all in LANGUAGES)")
+    parser.add_argument("--out", default=CATALOG_DIR, help="catalog output directory")
+    args = parser.parse_args()
+
+    build_catalogs(args.languages, catalog_dir=args.out)
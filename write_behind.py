@@ -0,0 +1,250 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import atexit
+import logging
+import threading
+
+# --- WRITE-BEHIND SETTINGS ---
+STORE_SPOOL_PATH = os.getenv("STORE_SPOOL_PATH", "store_spool.db")
+SPOOL_BATCH_SIZE = int(os.getenv("STORE_SPOOL_BATCH_SIZE", 500))
+SPOOL_FLUSH_INTERVAL = float(os.getenv("STORE_SPOOL_FLUSH_INTERVAL", 1))
+SPOOL_MAX_BACKOFF = float(os.getenv("STORE_SPOOL_MAX_BACKOFF", 60))
+# A claimed batch not written within this time is handed to another writer
+SPOOL_LEASE_SECONDS = 120
+# Attempts for rows the database rejects; outages are retried indefinitely
+SPOOL_MAX_ATTEMPTS = 5
+
+
+def _json_default(value):
+    # NumPy scalars (e.g. predictions) become plain Python numbers
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class DatabaseUnavailable(Exception):
+    """The database could not be reached; spooled rows are kept for a later attempt."""
+
+
+class WriteBehindQueue:
+    """Durable local spool of rows waiting to be inserted into the database.
+
+    ``enqueue`` commits the row to a SQLite file (WAL mode) and returns at
+    once. A background thread claims batches, hands each table's rows to
+    ``write_batch(table, records)`` and deletes them once written.
+
+    When a write fails, ``ping()`` tells an outage from a bad row. During an
+    outage the thread backs off exponentially and rows survive restarts;
+    rows the database rejects are retried one by one and set aside as
+    failed after SPOOL_MAX_ATTEMPTS. Without ``ping`` every failure is
+    treated as an outage.
+    """
+
+    def __init__(self, write_batch, ping=None, path=STORE_SPOOL_PATH, batch_size=SPOOL_BATCH_SIZE,
+                 flush_interval=SPOOL_FLUSH_INTERVAL, max_backoff=SPOOL_MAX_BACKOFF):
+        self.write_batch = write_batch
+        self.ping = ping
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._conn = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _db(self):
+        """Open the spool on first use (caller holds the lock)."""
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS spool (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    table_name TEXT NOT NULL,
+                    record TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_until REAL NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    error TEXT
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS spool_ready ON spool (failed, lease_until, id)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def enqueue(self, table, record):
+        """Spool one row for ``table``; durable once this returns."""
+        payload = json.dumps(record, default=_json_default)
+        with self._lock:
+            conn = self._db()
+            conn.execute("INSERT INTO spool (table_name, record) VALUES (?, ?)", (table, payload))
+            conn.commit()
+        self.start()
+        self._wake.set()
+
+    # --- SPOOL BOOKKEEPING ---
+    def _claim(self):
+        """Lease the oldest ready rows so no other writer picks them up meanwhile."""
+        now = time.time()
+        with self._lock:
+            conn = self._db()
+            rows = conn.execute(
+                "UPDATE spool SET lease_until = ? WHERE id IN ("
+                " SELECT id FROM spool WHERE failed = 0 AND lease_until < ? ORDER BY id LIMIT ?"
+                ") RETURNING id, table_name, record, attempts",
+                (now + SPOOL_LEASE_SECONDS, now, self.batch_size),
+            ).fetchall()
+            conn.commit()
+        return sorted(rows)
+
+    def _delete(self, ids):
+        with self._lock:
+            conn = self._db()
+            conn.executemany("DELETE FROM spool WHERE id = ?", [(i,) for i in ids])
+            conn.commit()
+
+    def _release(self, ids):
+        with self._lock:
+            conn = self._db()
+            conn.executemany("UPDATE spool SET lease_until = 0 WHERE id = ?", [(i,) for i in ids])
+            conn.commit()
+
+    def _reject(self, row_id, attempts, error):
+        """Count a rejected attempt; retry later, or set the row aside after SPOOL_MAX_ATTEMPTS."""
+        attempts += 1
+        retry_at = time.time() + min(self.max_backoff, self.flush_interval * 2 ** attempts)
+        with self._lock:
+            conn = self._db()
+            conn.execute(
+                "UPDATE spool SET attempts = ?, lease_until = ?, failed = ?, error = ? WHERE id = ?",
+                (attempts, retry_at, int(attempts >= SPOOL_MAX_ATTEMPTS), str(error), row_id),
+            )
+            conn.commit()
+        if attempts >= SPOOL_MAX_ATTEMPTS:
+            logging.warning(f"Spooled row {row_id} rejected {attempts} times, set aside: {error}")
+
+    # --- FLUSHING ---
+    def _reachable(self):
+        if self.ping is None:
+            return False
+        try:
+            self.ping()
+            return True
+        except Exception:
+            return False
+
+    def _write(self, table, records):
+        """write_batch, raising DatabaseUnavailable if the failure was the database being unreachable."""
+        try:
+            self.write_batch(table, records)
+        except Exception as e:
+            if not self._reachable():
+                raise DatabaseUnavailable(e) from e
+            raise
+
+    def flush_once(self):
+        """Write one batch of spooled rows; returns how many were handled (written or rejected).
+
+        Raises DatabaseUnavailable if the database can't be reached (the
+        unwritten rows are released for a later attempt).
+        """
+        rows = self._claim()
+        by_table = {}
+        for row_id, table, record, attempts in rows:
+            by_table.setdefault(table, []).append((row_id, json.loads(record), attempts))
+
+        done = set()
+        try:
+            for table, items in by_table.items():
+                try:
+                    self._write(table, [record for _, record, _ in items])
+                except DatabaseUnavailable:
+                    raise
+                except Exception:
+                    # Rejected batch: write rows one at a time so only the bad ones are held back
+                    for row_id, record, attempts in items:
+                        try:
+                            self._write(table, [record])
+                        except DatabaseUnavailable:
+                            raise
+                        except Exception as e:
+                            self._reject(row_id, attempts, e)
+                        else:
+                            self._delete([row_id])
+                        done.add(row_id)
+                else:
+                    self._delete([row_id for row_id, _, _ in items])
+                    done.update(row_id for row_id, _, _ in items)
+        except DatabaseUnavailable:
+            self._release([row[0] for row in rows if row[0] not in done])
+            raise
+        return len(rows)
+
+    def flush(self, timeout=None):
+        """Write everything spooled now, in the calling thread. Returns rows handled."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        total = 0
+        while deadline is None or time.monotonic() < deadline:
+            written = self.flush_once()
+            total += written
+            if written == 0:
+                break
+        return total
+
+    def _run(self):
+        failures = 0
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                written = self.flush_once()
+                failures = 0
+            except DatabaseUnavailable as e:
+                failures += 1
+                delay = min(self.max_backoff, self.flush_interval * 2 ** failures) * random.uniform(0.5, 1)
+                logging.warning(f"Database unreachable, retrying {self.stats()['pending']} spooled rows in {delay:.1f}s: {e}")
+                self._stop.wait(delay)
+                continue
+            except Exception as e:
+                logging.warning(f"Write-behind flush failed: {e}")
+                written = 0
+            if written < self.batch_size:
+                self._wake.wait(self.flush_interval)
+
+    def start(self):
+        """Start the background writer (once per process)."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="store-writer", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+
+    def resume(self):
+        """Start writing rows left in the spool by an earlier process, if there are any."""
+        if os.path.exists(self.path) and self.stats()["pending"]:
+            self.start()
+
+    def close(self, timeout=5):
+        """Stop the background writer and try to write what is left."""
+        self._stop.set()
+        self._wake.set()
+        try:
+            self.flush(timeout)
+        except DatabaseUnavailable as e:
+            logging.warning(f"{self.stats()['pending']} rows stay spooled until the database is back: {e}")
+
+    def stats(self):
+        with self._lock:
+            pending, failed = self._db().execute(
+                "SELECT COALESCE(SUM(failed = 0), 0), COALESCE(SUM(failed), 0) FROM spool"
+            ).fetchone()
+        return {"pending": pending, "failed": failed}